@@ -0,0 +1,72 @@
+from functools import partial
+
+from api.db.pool import get_pool
+from django.conf import settings
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+POOL_DEFAULTS = {'MAX_SIZE': 10, 'TIMEOUT': 10, 'MAX_LIFETIME': 600}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с общим для потоков процесса пулом соединений.
+    Django закрывает соединение в конце запроса, а пул оставляет
+    его открытым для следующего. Размер пула, ожидание свободного
+    соединения и время жизни задаёт ключ POOL настройки базы.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(
+            self.alias, self.settings_dict['NAME'],
+            {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        )
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire(
+            partial(super().get_new_connection, conn_params),
+            self.check_connection if settings.CONN_HEALTH_CHECKS else None
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Внутри atomic() Django сохраняет ссылку на закрытое соединение,
+        # поэтому отдать его другому потоку нельзя.
+        self.pool.release(
+            self.connection,
+            not self.in_atomic_block
+            and self.reset_connection(self.connection)
+        )
+
+    @staticmethod
+    def check_connection(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    @staticmethod
+    def reset_connection(connection):
+        """
+        Откатывает незавершённую транзакцию перед возвратом в пул.
+        False, если соединение больше нельзя использовать.
+        """
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                return False
+        return True
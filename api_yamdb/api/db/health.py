@@ -0,0 +1,31 @@
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+
+_lock = Lock()
+_counters = {'checks': 0, 'reconnects': 0}
+
+
+def close_unusable_connections(**kwargs):
+    """
+    Перед повторным использованием постоянного соединения проверяет,
+    что оно живо. Разорванное закрывается, и запрос откроет новое
+    вместо ошибки на первом же SQL.
+    """
+    if not settings.CONN_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        usable = connection.is_usable()
+        with _lock:
+            _counters['checks'] += 1
+            _counters['reconnects'] += not usable
+        if not usable:
+            connection.close()
+
+
+def health_stats():
+    with _lock:
+        return dict(_counters)
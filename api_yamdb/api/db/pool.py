@@ -0,0 +1,130 @@
+from collections import deque
+from threading import Condition, Lock
+from time import monotonic
+
+from django.db.utils import OperationalError
+
+COUNTERS = ('checkouts', 'connects', 'reconnects', 'waits', 'timeouts')
+
+_pools = {}
+_pools_lock = Lock()
+
+
+class PoolTimeout(OperationalError):
+    """Свободное соединение не появилось за время ожидания."""
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул соединений процесса. Поток берёт свободное
+    соединение, открывает новое, пока их меньше max_size, или ждёт
+    освобождения не дольше timeout секунд. Соединения старше
+    max_lifetime секунд закрываются при возврате в пул.
+    """
+
+    def __init__(self, max_size, timeout, max_lifetime):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.condition = Condition()
+        self.idle = deque()
+        self.opened = {}
+        self.size = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def acquire(self, connect, check=None):
+        """
+        Выдаёт соединение. Свободное соединение перед выдачей
+        проверяется функцией check; разорванное заменяется новым.
+        """
+        connection = self.take()
+        if connection is not None:
+            if check is None or check(connection):
+                return connection
+            self.forget(connection)
+            with self.condition:
+                self.counters['reconnects'] += 1
+        try:
+            connection = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.opened[connection] = monotonic()
+            self.counters['connects'] += 1
+        return connection
+
+    def take(self):
+        """Свободное соединение или None, если место под новое занято."""
+        deadline = None
+        with self.condition:
+            self.counters['checkouts'] += 1
+            while not self.idle and self.size >= self.max_size:
+                if deadline is None:
+                    self.counters['waits'] += 1
+                    deadline = monotonic() + self.timeout
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'Нет свободного соединения за {self.timeout} с.'
+                    )
+                self.condition.wait(remaining)
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул или закрывает его."""
+        with self.condition:
+            opened = self.opened.get(connection, 0)
+            keep = reusable and monotonic() - opened < self.max_lifetime
+            if keep:
+                self.idle.append(connection)
+            else:
+                self.size -= 1
+            self.condition.notify()
+        if not keep:
+            self.forget(connection)
+
+    def forget(self, connection):
+        with self.condition:
+            self.opened.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'open': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                **self.counters,
+            }
+
+
+def get_pool(alias, database, options):
+    """Пул процесса для базы database подключения alias."""
+    with _pools_lock:
+        if (alias, database) not in _pools:
+            _pools[alias, database] = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_lifetime=options['MAX_LIFETIME'],
+            )
+        return _pools[alias, database]
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return [
+        {'alias': alias, 'database': database, **pool.stats()}
+        for (alias, database), pool in sorted(pools.items())
+    ]
@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .db.health import close_unusable_connections
+from .metrics import current_metrics, track_queries
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """
+    Общий для процесса пул потоков, в которых под ASGI выполняются
+    представления. Размер пула ограничивает и число соединений с БД.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_VIEW_THREADS,
+        thread_name_prefix='api-view'
+    )
+
+
+def call_view(view, request, *args, **kwargs):
+    """
+    Выполняет представление в потоке пула и сразу рендерит ответ
+    (потоковый собирает целиком), чтобы сериализация JSON не занимала
+    ни общий поток Django, ни цикл событий.
+    Соединения потока закрываются по правилам CONN_MAX_AGE,
+    как это делают сигналы начала и конца запроса.
+    """
+    close_old_connections()
+    close_unusable_connections()
+    try:
+        with track_queries(current_metrics()):
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+            elif response.streaming:
+                # Django 3.2 читает потоковый ответ в цикле событий.
+                response.streaming_content = list(
+                    response.streaming_content
+                )
+            return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(), partial(context.run, func, *args, **kwargs)
+    )
+
+
+def async_view(view):
+    """
+    Асинхронная обёртка синхронного представления: цикл событий
+    не блокируется, пока запрос ждёт БД, а одновременно выполняется
+    не больше ASYNC_VIEW_THREADS представлений.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_pool(call_view, view, request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,238 @@
+import json
+import re
+
+from api.v1.pagination import SwitchablePagination
+from api.v1.urls import router_v1
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.filters import SearchFilter
+from rest_framework.test import APIRequestFactory, force_authenticate
+from reviews.models import Category, Comments, Genre, Review, Title
+from users.models import User
+
+API_PREFIX = '/api/v1/'
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+SQLITE_SORT = 'USE TEMP B-TREE'
+FILTER_VARIANTS = {
+    'titles': (
+        lambda s: {'genre': s['genre'].slug},
+        lambda s: {'category': s['category'].slug},
+        lambda s: {'category': s['category'].slug, 'ordering': '-rating'},
+        lambda s: {'year': s['titles'].year},
+        lambda s: {'q': s['titles'].name.split()[0]},
+    ),
+}
+
+
+def get_samples():
+    """
+    Подбирает представительные объекты: самые наполненные
+    категорию, жанр, произведение и отзыв.
+    """
+    title = Title.objects.order_by('-review_count', 'pk').first()
+    review = Review.objects.filter(title=title).annotate(
+        comment_count=Count('comments')
+    ).order_by('-comment_count', 'pk').first()
+    samples = {
+        'users': User.objects.order_by('pk').first(),
+        'categories': Category.objects.annotate(
+            title_count=Count('titles')
+        ).order_by('-title_count', 'pk').first(),
+        'genres': Genre.objects.annotate(
+            title_count=Count('title')
+        ).order_by('-title_count', 'pk').first(),
+        'titles': title,
+        'reviews': review,
+        'comments': Comments.objects.filter(review=review).first(),
+    }
+    if None in samples.values():
+        return None
+    samples['category'] = samples['categories']
+    samples['genre'] = samples['genres']
+    samples['title_id'] = title.pk
+    samples['review_id'] = review.pk
+    return samples
+
+
+def get_variants(prefix, viewset, basename, samples):
+    """Перечисляет (действие, параметры запроса, kwargs) эндпоинта."""
+    kwargs = {
+        name: samples[name] for name in re.compile(prefix).groupindex
+    }
+    variants = [('list', {}, kwargs)]
+    if SearchFilter in viewset.filter_backends:
+        word = str(samples[basename]).split()[-1][:3]
+        variants.append(('list', {SearchFilter.search_param: word}, kwargs))
+    for field in getattr(viewset, 'ordering_fields', None) or ():
+        variants.append(('list', {'ordering': f'-{field}'}, kwargs))
+    for make_params in FILTER_VARIANTS.get(basename, ()):
+        variants.append(('list', make_params(samples), kwargs))
+    if viewset.pagination_class is SwitchablePagination:
+        variants.append(('list', {'pagination': 'keyset'}, kwargs))
+    if hasattr(viewset, 'retrieve'):
+        lookup = viewset.lookup_url_kwarg or viewset.lookup_field
+        value = getattr(samples[basename], viewset.lookup_field)
+        variants.append(('retrieve', {}, {**kwargs, lookup: value}))
+    return variants
+
+
+def walk_pg_plan(node, found):
+    node_type = node['Node Type']
+    if node_type == 'Seq Scan':
+        found['seq_scans'].append(
+            f"{node['Relation Name']} ({node.get('Filter', 'без фильтра')})"
+        )
+    if node_type in ('Sort', 'Incremental Sort'):
+        found['sorts'].append(', '.join(node['Sort Key']))
+    for child in node.get('Plans', ()):
+        walk_pg_plan(child, found)
+
+
+def explain_postgresql(cursor, sql, analyze):
+    options = 'FORMAT JSON, ANALYZE' if analyze else 'FORMAT JSON'
+    cursor.execute(f'EXPLAIN ({options}) {sql}')
+    result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    plan = result[0]
+    found = {
+        'seq_scans': [],
+        'sorts': [],
+        'cost': plan['Plan']['Total Cost'],
+        'time': plan.get('Execution Time'),
+    }
+    walk_pg_plan(plan['Plan'], found)
+    return found
+
+
+def explain_sqlite(cursor, sql, analyze):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+    details = [row[-1] for row in cursor.fetchall()]
+    return {
+        'seq_scans': [
+            detail.split()[1] for detail in details
+            if detail.startswith('SCAN ') and ' USING ' not in detail
+        ],
+        'sorts': [detail for detail in details if SQLITE_SORT in detail],
+        'cost': None,
+        'time': None,
+    }
+
+
+EXPLAINERS = {
+    'postgresql': explain_postgresql,
+    'sqlite': explain_sqlite,
+}
+
+
+class Command(BaseCommand):
+    """Проверяет планы запросов всех эндпоинтов API."""
+
+    help = (
+        'Выполняет чтение каждого эндпоинта router_v1 с типичными '
+        'фильтрами и показывает EXPLAIN его запросов: '
+        'последовательные сканирования, сортировки и стоимость.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Выполнить EXPLAIN ANALYZE (только PostgreSQL).'
+        )
+        parser.add_argument(
+            '--sql',
+            action='store_true',
+            help='Печатать текст запросов.'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдены '
+                 'последовательные сканирования.'
+        )
+
+    def handle(self, *args, **options):
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(
+                f'EXPLAIN для {connection.vendor} не поддерживается.'
+            )
+        samples = get_samples()
+        if samples is None:
+            raise CommandError(
+                'Нужны данные: хотя бы одно произведение с отзывом '
+                'и комментарием, категория, жанр и пользователь.'
+            )
+        self.factory = APIRequestFactory()
+        self.user = User(username='explain', role='admin', is_superuser=True)
+        self.explain = explain
+        self.options = options
+        self.missing = []
+        with override_settings(CACHES=DUMMY_CACHES):
+            for prefix, viewset, basename in router_v1.registry:
+                for variant in get_variants(
+                    prefix, viewset, basename, samples
+                ):
+                    self.explain_variant(prefix, viewset, *variant)
+        self.report_missing()
+
+    def explain_variant(self, prefix, viewset, action, params, kwargs):
+        path = API_PREFIX + re.sub(
+            r'\(\?P<(\w+)>[^)]*\)',
+            lambda match: str(kwargs[match.group(1)]),
+            prefix.lstrip('^')
+        ) + '/'
+        if action == 'retrieve':
+            lookup = viewset.lookup_url_kwarg or viewset.lookup_field
+            path += f'{kwargs[lookup]}/'
+        request = self.factory.get(path, params)
+        force_authenticate(request, user=self.user)
+        view = viewset.as_view({'get': action})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, **kwargs)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'GET {request.get_full_path()} [{action}] '
+            f'{response.status_code}, запросов: {len(queries)}'
+        ))
+        with connection.cursor() as cursor:
+            for number, query in enumerate(queries, 1):
+                if query['sql'].lstrip().upper().startswith('SELECT'):
+                    self.explain_query(cursor, number, query, path)
+
+    def explain_query(self, cursor, number, query, path):
+        found = self.explain(cursor, query['sql'], self.options['analyze'])
+        cost = '-' if found['cost'] is None else f'{found["cost"]:.1f}'
+        time = found['time']
+        if time is None:
+            time = float(query['time']) * 1000
+        self.stdout.write(
+            f'  #{number} стоимость {cost}, время {time:.2f} мс'
+        )
+        if self.options['sql']:
+            self.stdout.write(f'     {query["sql"]}')
+        for scan in found['seq_scans']:
+            self.stdout.write(self.style.WARNING(f'     Seq Scan: {scan}'))
+            self.missing.append((path, scan))
+        for sort in found['sorts']:
+            self.stdout.write(self.style.NOTICE(f'     Sort: {sort}'))
+
+    def report_missing(self):
+        if not self.missing:
+            self.stdout.write(self.style.SUCCESS(
+                'Последовательных сканирований не найдено.'
+            ))
+            return
+        self.stdout.write(self.style.WARNING(
+            'Возможно, не хватает индексов:'
+        ))
+        for path, scan in dict.fromkeys(self.missing):
+            self.stdout.write(f'  {path}: {scan}')
+        if self.options['strict']:
+            raise CommandError(
+                f'Последовательных сканирований: {len(self.missing)}'
+            )
@@ -0,0 +1,183 @@
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+PERCENTILES = (50, 95, 99)
+TIMINGS = ('total', 'view', 'sql', 'serialize', 'render')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: число запросов к БД и время по этапам."""
+
+    def __init__(self):
+        self.queries = 0
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+        # Запросы считаются, только если поток обёрнут track_queries.
+        self.queries_tracked = False
+        # Этапы, которые ещё идут, например, при отдаче потока.
+        self.pending = set()
+
+    def add(self, name, seconds):
+        self.timings[name] += seconds
+
+    def measured(self):
+        """Время только тех этапов, которые действительно измерены."""
+        skipped = set(self.pending)
+        if not self.queries_tracked:
+            skipped.add('sql')
+        return {
+            name: seconds for name, seconds in self.timings.items()
+            if name not in skipped
+        }
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('sql', perf_counter() - started)
+
+    def as_dict(self):
+        return {
+            **({'queries': self.queries} if self.queries_tracked else {}),
+            **{
+                f'{name}_ms': round(seconds * 1000, 3)
+                for name, seconds in self.measured().items()
+            },
+        }
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, resume_request(metrics)
+
+
+def resume_request(metrics):
+    """Делает metrics текущими, например, на время отдачи потока."""
+    return _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current_metrics():
+    """Метрики текущего запроса или None, если сбор выключен."""
+    return _current.get()
+
+
+@contextmanager
+def track_queries(metrics):
+    """
+    Считает в metrics запросы всех соединений текущего потока.
+    Без метрик ничего не оборачивает.
+    """
+    with ExitStack() as stack:
+        if metrics is not None:
+            metrics.queries_tracked = True
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+        yield
+
+
+@lru_cache(maxsize=None)
+def timed_serializer_class(serializer_class):
+    """
+    Подкласс сериализатора, время to_representation которого
+    учитывается в метриках запроса. Вложенные сериализаторы
+    остаются прежними, поэтому время не считается дважды.
+    """
+
+    class TimedSerializer(serializer_class):
+
+        def to_representation(self, instance):
+            metrics = current_metrics()
+            if metrics is None:
+                return super().to_representation(instance)
+            started = perf_counter()
+            try:
+                return super().to_representation(instance)
+            finally:
+                metrics.add('serialize', perf_counter() - started)
+
+    TimedSerializer.__name__ = serializer_class.__name__
+    TimedSerializer.__qualname__ = serializer_class.__qualname__
+    TimedSerializer.__module__ = serializer_class.__module__
+    return TimedSerializer
+
+
+def percentile(ordered, percent):
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+class EndpointStats:
+    """
+    Скользящее окно последних запросов по каждому эндпоинту процесса,
+    из которого считаются перцентили.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.lock = Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.counts = defaultdict(int)
+
+    def record(self, endpoint, metrics):
+        with self.lock:
+            self.samples[endpoint].append((
+                metrics.queries if metrics.queries_tracked else None,
+                metrics.measured()
+            ))
+            self.counts[endpoint] += 1
+
+    def snapshot(self):
+        with self.lock:
+            samples = {
+                endpoint: list(values)
+                for endpoint, values in self.samples.items()
+            }
+            counts = dict(self.counts)
+        return {
+            endpoint: self.summarize(values, counts[endpoint])
+            for endpoint, values in sorted(samples.items())
+        }
+
+    def summarize(self, values, count):
+        series = {'queries': sorted(
+            queries for queries, _ in values if queries is not None
+        )}
+        for name in TIMINGS:
+            series[f'{name}_ms'] = sorted(
+                timings[name] * 1000 for _, timings in values
+                if name in timings
+            )
+        return {
+            'count': count,
+            'window': len(values),
+            **{
+                name: {
+                    f'p{percent}': round(percentile(ordered, percent), 3)
+                    for percent in PERCENTILES
+                }
+                for name, ordered in series.items() if ordered
+            },
+        }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+
+
+endpoint_stats = EndpointStats(settings.REQUEST_METRICS_WINDOW)
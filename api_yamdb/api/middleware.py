@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import (endpoint_stats, finish_request, resume_request,
+                      start_request, track_queries)
+
+logger = logging.getLogger('api.metrics')
+
+SERVER_TIMING = (
+    ('sql', 'SQL'),
+    ('serialize', 'Serializers'),
+    ('render', 'Rendering'),
+    ('view', 'View'),
+    ('total', 'Total'),
+)
+# Потоковый ответ сериализуется и кодируется после заголовков.
+STREAMED_TIMINGS = ('serialize', 'render')
+
+
+class RequestMetricsMiddleware:
+    """
+    Считает для каждого запроса число запросов к БД, время SQL,
+    сериализации, представления и рендеринга. Отдаёт их в заголовке
+    Server-Timing, пишет строкой JSON в лог api.metrics и копит
+    перцентили по эндпоинтам. Включается настройкой REQUEST_METRICS.
+    Под ASGI запросы к БД считает поток, выполняющий представление;
+    у синхронных представлений их число и время SQL не известны
+    и в заголовок не попадают. У потокового ответа в заголовке нет
+    сериализации и рендеринга, а лог и перцентили записываются,
+    когда поток отдан.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics, token = start_request()
+        request.metrics = metrics
+        started = perf_counter()
+        try:
+            with track_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            finish_request(token)
+        self.complete(request, response, metrics, started)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        request.metrics = metrics
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        self.complete(request, response, metrics, started)
+        return response
+
+    def complete(self, request, response, metrics, started):
+        finished = perf_counter()
+        metrics.add('total', finished - started)
+        if response.streaming:
+            self.finish_view(request)
+            metrics.pending.update(STREAMED_TIMINGS)
+            self.set_header(response, metrics)
+            response.streaming_content = self.measure_stream(
+                request, response, response.streaming_content, metrics
+            )
+            return
+        view_finished = getattr(request, 'metrics_view_finished', None)
+        if view_finished is not None:
+            metrics.add('render', finished - view_finished)
+        self.finish_view(request)
+        self.set_header(response, metrics)
+        self.report(request, response, metrics)
+
+    def measure_stream(self, request, response, chunks, metrics):
+        """
+        Отдаёт части потокового ответа, добавляя к метрикам время их
+        сериализации, кодирования и SQL, и записывает метрики, когда
+        поток отдан или закрыт клиентом.
+        """
+        chunks = iter(chunks)
+        try:
+            while True:
+                started = perf_counter()
+                serialized = metrics.timings['serialize']
+                token = resume_request(metrics)
+                try:
+                    with track_queries(
+                        metrics if metrics.queries_tracked else None
+                    ):
+                        chunk = next(chunks, None)
+                finally:
+                    finish_request(token)
+                elapsed = perf_counter() - started
+                metrics.add('total', elapsed)
+                metrics.add(
+                    'render',
+                    elapsed - (metrics.timings['serialize'] - serialized)
+                )
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            metrics.pending.clear()
+            self.report(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view_started = perf_counter()
+
+    def process_template_response(self, request, response):
+        self.finish_view(request)
+        return response
+
+    def process_exception(self, request, exception):
+        self.finish_view(request)
+
+    def finish_view(self, request):
+        started = getattr(request, 'metrics_view_started', None)
+        if started is None or hasattr(request, 'metrics_view_finished'):
+            return
+        request.metrics_view_finished = perf_counter()
+        request.metrics.add('view', request.metrics_view_finished - started)
+
+    def set_header(self, response, metrics):
+        timings = metrics.measured()
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={timings[name] * 1000:.3f};desc="{desc}"'
+            for name, desc in SERVER_TIMING if name in timings
+        ) + (
+            f', db;desc="{metrics.queries} queries"'
+            if metrics.queries_tracked else ''
+        )
+
+    def report(self, request, response, metrics):
+        match = request.resolver_match
+        endpoint = f'{request.method} {match.view_name if match else "-"}'
+        endpoint_stats.record(endpoint, metrics)
+        logger.info(json.dumps({
+            'endpoint': endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }, ensure_ascii=False))
@@ -0,0 +1,76 @@
+from functools import partial
+
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+from .db.health import close_unusable_connections
+from .v1.authentication import CLAIMS, TOKEN_VERSION_CLAIM, revoke_tokens
+from .v1.cache import (CATEGORY_CACHE_PREFIX, GENRE_CACHE_PREFIX,
+                       bump_generation)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    transaction.on_commit(partial(bump_generation, CATEGORY_CACHE_PREFIX))
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def invalidate_genre_cache(sender, **kwargs):
+    transaction.on_commit(partial(bump_generation, GENRE_CACHE_PREFIX))
+
+
+CLAIMED_FIELDS = tuple(
+    claim for claim in CLAIMS if claim != TOKEN_VERSION_CLAIM
+)
+
+
+@receiver(pre_save, sender=User)
+def detect_claims_change(sender, instance, raw=False, update_fields=None,
+                         **kwargs):
+    """Запоминает, какие поля, подписанные в токене, меняет сохранение."""
+    instance._changed_claims = frozenset()
+    if raw or instance._state.adding:
+        return
+    deferred = instance.get_deferred_fields()
+    fields = [
+        name for name in CLAIMED_FIELDS
+        if name not in deferred
+        and (update_fields is None or name in update_fields)
+    ]
+    if not fields:
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if stored is not None:
+        instance._changed_claims = frozenset(
+            name for name in fields if stored[name] != getattr(instance, name)
+        )
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_claims_change(sender, instance, **kwargs):
+    """
+    Отзывает токены после смены имени, роли или прав суперпользователя,
+    откуда бы ни пришло изменение: API, админка или shell.
+    После смены имени увеличивает версии отзывов и комментариев
+    автора, чтобы ETag их списков не отдавал старое имя.
+    """
+    changed = getattr(instance, '_changed_claims', frozenset())
+    if not changed:
+        return
+    instance._changed_claims = frozenset()
+    revoke_tokens(instance)
+    # Повторное сохранение объекта не должно вернуть старую версию.
+    instance.refresh_from_db(fields=['token_version'])
+    if 'username' in changed:
+        Title.objects.filter(reviews__author=instance).touch()
+        Review.objects.filter(
+            Q(author=instance) | Q(comments__author=instance)
+        ).touch()
+
+
+request_started.connect(close_unusable_connections)
@@ -0,0 +1,657 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from reviews.models import (Category, Comments, Genre, Review, Title,
+                            TitleSummary)
+from users.models import OutgoingEmail, User
+from users.outbox import OUTBOX
+
+from .metrics import endpoint_stats
+from .v1.authentication import (_token_versions, get_token_version,
+                                issue_access_token)
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {issue_access_token(user)}'
+    )
+    return client
+
+
+class TokenTestCase(TestCase):
+    """
+    Тест с пустым кэшем версий токенов: id пользователей после отката
+    транзакции повторяются, и версия из прошлого теста не должна мешать.
+    """
+
+    def setUp(self):
+        _token_versions.clear()
+
+
+class SoftDeleteTests(TokenTestCase):
+    """Помеченные на удаление записи сразу пропадают из API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=User.ADMIN
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@example.com'
+        )
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, text='Текст', score=5
+        )
+        Comments.objects.create(
+            review=cls.review, author=cls.user, text='Комментарий'
+        )
+        TitleSummary.objects.rebuild()
+
+    def test_deleted_title_not_found(self):
+        admin = client_for(self.admin)
+        response = admin.delete(f'/api/v1/titles/{self.title.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        for url in (
+            f'/api/v1/titles/{self.title.pk}/',
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            f'/api/v1/titles/{self.title.pk}/reviews/{self.review.pk}/',
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+            f'{self.review.pk}/comments/',
+            f'/api/v1/titles/{self.title.pk}/score-distribution/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    admin.get(url).status_code, status.HTTP_404_NOT_FOUND
+                )
+        response = admin.get('/api/v1/titles/')
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_deleted_user_token_rejected(self):
+        client = client_for(self.user)
+        response = client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client_for(self.admin).delete(
+            f'/api/v1/users/{self.user.username}/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenRevocationTests(TokenTestCase):
+    """Смена подписанных в токене полей отзывает выпущенные токены."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=User.ADMIN
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@example.com'
+        )
+
+    def test_role_change_rejects_old_token(self):
+        client = client_for(self.user)
+        self.assertEqual(
+            client.get('/api/v1/users/me/').status_code, status.HTTP_200_OK
+        )
+        response = client_for(self.admin).patch(
+            f'/api/v1/users/{self.user.username}/',
+            {'role': User.MODERATOR}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for _ in range(2):
+            self.assertEqual(
+                client.get('/api/v1/users/me/').status_code,
+                status.HTTP_401_UNAUTHORIZED
+            )
+        self.user.refresh_from_db()
+        # Вторая проверка уже берёт версию из кэша процесса.
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_token_version(self.user.pk), self.user.token_version
+            )
+        response = client_for(self.user).get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['role'], User.MODERATOR)
+
+    def test_username_change_rejects_old_token(self):
+        client = client_for(self.user)
+        response = client.patch('/api/v1/users/me/', {'username': 'renamed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            client.get('/api/v1/users/me/').status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_profile_edit_keeps_token(self):
+        client = client_for(self.user)
+        response = client.patch('/api/v1/users/me/', {'bio': 'О себе'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['bio'], 'О себе')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 0)
+
+
+@override_settings(EMAIL_DELIVERY=OUTBOX)
+class SignupTests(TestCase):
+    """Регистрация создаёт пользователя и ровно одно письмо на запрос."""
+
+    url = '/api/v1/auth/signup/'
+
+    def signup(self, username, email):
+        return self.client.post(
+            self.url, {'username': username, 'email': email}
+        )
+
+    def test_new_user(self):
+        response = self.signup('newbie', 'newbie@example.com')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {'username': 'newbie', 'email': 'newbie@example.com'}
+        )
+        self.assertTrue(User.objects.filter(username='newbie').exists())
+        self.assertEqual(
+            list(OutgoingEmail.objects.values_list('to', flat=True)),
+            ['newbie@example.com']
+        )
+
+    def test_resend_to_same_user(self):
+        self.signup('newbie', 'newbie@example.com')
+        response = self.signup('newbie', 'newbie@example.com')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {'confirmation_code': 'код подтверждения обновлен'}
+        )
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+    def test_conflicts(self):
+        self.signup('taken', 'taken@example.com')
+        self.signup('other', 'other@example.com')
+        for username, email, errors in (
+            ('taken', 'fresh@example.com', {
+                'username': ['Это имя пользователя уже занято.'],
+            }),
+            ('fresh', 'taken@example.com', {
+                'email': ['Этот email уже используется!'],
+            }),
+            ('taken', 'other@example.com', {
+                'username': ['Это имя пользователя уже занято.'],
+                'email': ['Этот email уже используется!'],
+            }),
+        ):
+            with self.subTest(username=username, email=email):
+                response = self.signup(username, email)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertEqual(response.json(), errors)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+
+class KeysetPaginationTests(TestCase):
+    """Курсоры проходят список целиком в обе стороны без пропусков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.titles = [
+            Title.objects.create(name=name, year=2000 + number % 3)
+            for number, name in enumerate('ВАБАВББАГ')
+        ]
+        cls.title = cls.titles[0]
+        for number in range(7):
+            author = User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@example.com'
+            )
+            Review.objects.create(
+                title=cls.title, author=author, text='Текст', score=5
+            )
+        TitleSummary.objects.rebuild()
+
+    def walk(self, url):
+        """Идёт по next до конца, затем по previous обратно."""
+        forward, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.json())
+            forward += [item['id'] for item in pages[-1]['results']]
+            url = pages[-1]['next']
+        backward = [item['id'] for item in pages[-1]['results']]
+        url = pages[-1]['previous']
+        while url:
+            page = self.client.get(url).json()
+            backward = [item['id'] for item in page['results']] + backward
+            url = page['previous']
+        self.assertEqual(backward, forward)
+        self.assertGreater(len(pages), 2)
+        return forward
+
+    def test_titles_round_trip(self):
+        for reads_summary in (True, False):
+            for ordering, expected in (
+                ('', ('name', 'pk')),
+                ('-name', ('-name', '-pk')),
+                ('year', ('year', 'pk')),
+                ('-year,name', ('-year', 'name', '-pk')),
+            ):
+                with self.subTest(
+                    reads_summary=reads_summary, ordering=ordering
+                ), self.settings(TITLE_SUMMARY_READS=reads_summary):
+                    self.assertEqual(
+                        self.walk(
+                            '/api/v1/titles/?pagination=keyset&limit=2'
+                            f'&ordering={ordering}'
+                        ),
+                        list(Title.objects.order_by(*expected).values_list(
+                            'pk', flat=True
+                        ))
+                    )
+
+    def test_reviews_round_trip(self):
+        self.assertEqual(
+            self.walk(
+                f'/api/v1/titles/{self.title.pk}/reviews/'
+                '?pagination=keyset&limit=3'
+            ),
+            list(self.title.reviews.order_by('-pub_date', 'id').values_list(
+                'pk', flat=True
+            ))
+        )
+
+    def test_search_keeps_rank_order(self):
+        for query in ('pagination=keyset', 'cursor=bm90LWpzb24'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/titles/?q=Б&{query}')
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('q', response.json())
+        response = self.client.get(
+            '/api/v1/titles/?q=Б&pagination=keyset&ordering=name'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/v1/titles/?q=Б')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_cursor_not_found(self):
+        response = self.client.get('/api/v1/titles/?cursor=bm90LWpzb24')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTests(TokenTestCase):
+    """Неизменённый ресурс отдаётся как 304, после записи — как 200."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='user', email='user@example.com'
+        )
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, text='Текст', score=5
+        )
+        TitleSummary.objects.rebuild()
+
+    def assert_revalidated(self, url, write):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        write()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_title_after_review(self):
+        author = User.objects.create(
+            username='other', email='other@example.com'
+        )
+        self.assert_revalidated(
+            f'/api/v1/titles/{self.title.pk}/',
+            lambda: client_for(author).post(
+                f'/api/v1/titles/{self.title.pk}/reviews/',
+                {'text': 'Ещё отзыв', 'score': 9}
+            )
+        )
+
+    def test_reviews_after_review_update(self):
+        self.assert_revalidated(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            lambda: client_for(self.user).patch(
+                f'/api/v1/titles/{self.title.pk}/reviews/{self.review.pk}/',
+                {'score': 1}
+            )
+        )
+
+    def test_comments_after_comment(self):
+        url = (
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+            f'{self.review.pk}/comments/'
+        )
+        self.assert_revalidated(
+            url,
+            lambda: client_for(self.user).post(url, {'text': 'Комментарий'})
+        )
+
+    def test_reviews_and_comments_after_author_rename(self):
+        commenter = User.objects.create(
+            username='commenter', email='commenter@example.com'
+        )
+        Comments.objects.create(
+            review=self.review, author=commenter, text='Комментарий'
+        )
+        for user, url in (
+            (self.user, f'/api/v1/titles/{self.title.pk}/reviews/'),
+            (
+                self.user,
+                f'/api/v1/titles/{self.title.pk}/reviews/{self.review.pk}/'
+            ),
+            (
+                commenter,
+                f'/api/v1/titles/{self.title.pk}/reviews/'
+                f'{self.review.pk}/comments/'
+            ),
+        ):
+            with self.subTest(url=url):
+                self.assert_revalidated(
+                    url,
+                    lambda: client_for(user).patch(
+                        '/api/v1/users/me/',
+                        {'username': f'{user.username}-renamed'}
+                    )
+                )
+                user.refresh_from_db()
+                self.assertContains(self.client.get(url), user.username)
+
+
+@override_settings(REQUEST_METRICS=True, JSON_STREAM_MIN_ITEMS=2)
+class RequestMetricsTests(TestCase):
+    """Метрики потокового ответа записываются, когда поток отдан."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+        TitleSummary.objects.rebuild()
+
+    def setUp(self):
+        endpoint_stats.reset()
+
+    def test_streamed_list_timings(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertTrue(response.streaming)
+        timing = response['Server-Timing']
+        self.assertIn('sql;', timing)
+        self.assertNotIn('serialize;', timing)
+        self.assertNotIn('render;', timing)
+        self.assertEqual(endpoint_stats.snapshot(), {})
+
+        with self.assertLogs('api.metrics', 'INFO') as logs:
+            b''.join(response.streaming_content)
+            response.close()
+        self.assertIn('"serialize_ms"', logs.output[0])
+        stats = endpoint_stats.snapshot()['GET api:titles-list']
+        self.assertEqual(stats['count'], 1)
+        self.assertGreater(stats['serialize_ms']['p50'], 0)
+        self.assertGreater(stats['render_ms']['p50'], 0)
+
+
+class TitleBulkTests(TokenTestCase):
+    """Пакетное сохранение возвращает результат или ошибки по элементам."""
+
+    url = '/api/v1/titles/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=User.ADMIN
+        )
+        Category.objects.create(name='Книги', slug='books')
+        Genre.objects.create(name='Драма', slug='drama')
+
+    def setUp(self):
+        super().setUp()
+        self.client = client_for(self.admin)
+
+    def test_create_reports_item_errors(self):
+        response = self.client.post(self.url, [
+            {'name': 'Верное', 'year': 2000, 'category': 'books',
+             'genre': ['drama']},
+            {'name': 'Без категории', 'year': 2000, 'category': 'nope',
+             'genre': ['drama']},
+            {'name': 'Без жанра', 'year': 2000, 'category': 'books',
+             'genre': ['nope']},
+            {'name': 'Из будущего', 'year': 3000, 'category': 'books',
+             'genre': []},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        created, *failed = response.json()
+        self.assertEqual(created['name'], 'Верное')
+        self.assertEqual(created['genre'], ['drama'])
+        self.assertEqual(created['category'], 'books')
+        self.assertEqual(
+            [sorted(item['errors']) for item in failed],
+            [['category'], ['genre'], ['year']]
+        )
+        self.assertEqual(
+            list(Title.objects.values_list('name', flat=True)), ['Верное']
+        )
+        self.assertEqual(
+            list(Title.objects.get().genre.values_list('slug', flat=True)),
+            ['drama']
+        )
+
+    def test_update_reports_missing_titles(self):
+        title = Title.objects.create(name='Старое', year=2000)
+        response = self.client.patch(self.url, [
+            {'id': title.pk, 'name': 'Новое'},
+            {'id': title.pk + 100, 'name': 'Нет такого'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updated, missing = response.json()
+        self.assertEqual(updated['name'], 'Новое')
+        self.assertEqual(list(missing['errors']), ['id'])
+        title.refresh_from_db()
+        self.assertEqual(title.name, 'Новое')
+        self.assertEqual(title.version, 2)
+
+    def test_rejects_non_list(self):
+        response = self.client.post(self.url, {'name': 'Одно'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CachedListTests(TokenTestCase):
+    """Списки категорий и жанров кэшируются до первой записи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=User.ADMIN
+        )
+        Category.objects.create(name='Книги', slug='books')
+        Genre.objects.create(name='Драма', slug='drama')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def names(self, url):
+        response = self.client.get(url)
+        return [item['name'] for item in response.json()['results']]
+
+    def test_list_invalidated_by_write(self):
+        for model, url, slug in (
+            (Category, '/api/v1/categories/', 'books'),
+            (Genre, '/api/v1/genres/', 'drama'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.names(url), [model.objects.get().name])
+                # Обновление без сигналов не сбрасывает кэш.
+                model.objects.update(name='Без сброса')
+                self.assertNotIn('Без сброса', self.names(url))
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = client_for(self.admin).post(
+                        url, {'name': 'Новая', 'slug': 'new'}
+                    )
+                self.assertEqual(
+                    response.status_code, status.HTTP_201_CREATED
+                )
+                self.assertEqual(
+                    sorted(self.names(url)), ['Без сброса', 'Новая']
+                )
+
+
+class GenreFilterTests(TestCase):
+    """Фильтр по нескольким жанрам в режимах any и all."""
+
+    @classmethod
+    def setUpTestData(cls):
+        drama, comedy, horror = (
+            Genre.objects.create(name=slug, slug=slug)
+            for slug in ('drama', 'comedy', 'horror')
+        )
+        cls.titles = {}
+        for name, genres in (
+            ('drama', [drama]),
+            ('both', [drama, comedy]),
+            ('all', [drama, comedy, horror]),
+            ('horror', [horror]),
+            ('none', []),
+        ):
+            title = Title.objects.create(name=name, year=2000)
+            title.genre.set(genres)
+            cls.titles[name] = title.pk
+        TitleSummary.objects.rebuild()
+
+    def test_any_and_all_modes(self):
+        for reads_summary in (True, False):
+            for query, expected in (
+                ('genre=drama,comedy', ['all', 'both', 'drama']),
+                ('genre=drama,comedy&genre_mode=any',
+                 ['all', 'both', 'drama']),
+                ('genre=drama,comedy&genre_mode=all', ['all', 'both']),
+                ('genre=comedy,horror,comedy&genre_mode=all', ['all']),
+                ('genre=horror,nope', ['all', 'horror']),
+                ('genre=nope&genre_mode=all', []),
+            ):
+                with self.subTest(
+                    reads_summary=reads_summary, query=query
+                ), self.settings(TITLE_SUMMARY_READS=reads_summary):
+                    response = self.client.get(
+                        f'/api/v1/titles/?{query}&limit=10'
+                    )
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(
+                        [item['id'] for item in response.json()['results']],
+                        [self.titles[name] for name in expected]
+                    )
+
+    def test_unknown_mode_rejected(self):
+        response = self.client.get('/api/v1/titles/?genre=drama&genre_mode=x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FastJSONTests(TokenTestCase):
+    """JSON разбирается и рендерится одинаково обычным и потоковым путём."""
+
+    name = 'Сто лет\u2028одиночества'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=User.ADMIN
+        )
+        Category.objects.create(name='Книги', slug='books')
+        Genre.objects.create(name='Драма', slug='drama')
+
+    def test_body_round_trip(self):
+        response = client_for(self.admin).post('/api/v1/titles/', {
+            'name': self.name, 'year': 1967, 'category': 'books',
+            'genre': ['drama'],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('Сто лет'.encode(), response.content)
+        self.assertIn(b'\\u2028', response.content)
+        self.assertEqual(response.json()['name'], self.name)
+        self.assertEqual(Title.objects.get().name, self.name)
+
+    def test_invalid_body_rejected(self):
+        response = client_for(self.admin).post(
+            '/api/v1/titles/', '{"name":', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', response.json())
+
+    def test_streamed_page_matches_plain(self):
+        for number in range(3):
+            Title.objects.create(name=f'{self.name} {number}', year=2000)
+        TitleSummary.objects.rebuild()
+        with self.settings(JSON_STREAM_MIN_ITEMS=1000):
+            plain = self.client.get('/api/v1/titles/')
+        with self.settings(JSON_STREAM_MIN_ITEMS=2):
+            streamed = self.client.get('/api/v1/titles/')
+        self.assertTrue(streamed.streaming)
+        content = b''.join(streamed.streaming_content)
+        self.assertNotIn('\u2028'.encode(), content)
+        self.assertEqual(json.loads(content), plain.json())
+        self.assertEqual(len(plain.json()['results']), 3)
+
+
+class SparseFieldsTests(TestCase):
+    """?fields= и ?expand= одинаково работают на обоих путях чтения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Книги', slug='books')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.title = Title.objects.create(
+            name='Первое', year=2000, category=category
+        )
+        cls.title.genre.set([genre])
+        TitleSummary.objects.rebuild()
+
+    def get(self, query):
+        return self.client.get(f'/api/v1/titles/{self.title.pk}/?{query}')
+
+    def test_fields_and_expand(self):
+        for reads_summary in (True, False):
+            with self.subTest(
+                reads_summary=reads_summary
+            ), self.settings(TITLE_SUMMARY_READS=reads_summary):
+                self.assertEqual(
+                    self.get('fields=id,name').json(),
+                    {'id': self.title.pk, 'name': 'Первое'}
+                )
+                self.assertEqual(
+                    self.get('fields=genre,category&expand=category').json(),
+                    {'genre': ['drama'],
+                     'category': {'name': 'Книги', 'slug': 'books'}}
+                )
+                self.assertEqual(
+                    self.get('fields=score_distribution&expand='
+                             'score_distribution').json(),
+                    {'score_distribution': {
+                        str(score): 0 for score in range(1, 11)
+                    }}
+                )
+                response = self.client.get(
+                    '/api/v1/titles/?fields=name,nope'
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('fields', response.json())
@@ -0,0 +1,87 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.db.models import F
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+TOKEN_VERSION_CLAIM = 'token_version'
+CLAIMS = ('username', 'role', 'is_superuser', TOKEN_VERSION_CLAIM)
+
+_token_versions = {}
+_token_versions_lock = Lock()
+
+
+def issue_access_token(user):
+    """Выпускает access-токен с данными, нужными для проверки прав."""
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_superuser'] = user.is_superuser
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def get_token_version(user_id):
+    """
+    Текущая версия токенов пользователя из кэша процесса.
+    Для удалённых и неактивных пользователей возвращает None.
+    """
+    now = time.monotonic()
+    cached = _token_versions.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    version = User.objects.filter(
+        pk=user_id, is_active=True
+    ).values_list('token_version', flat=True).first()
+    with _token_versions_lock:
+        if len(_token_versions) >= settings.JWT_USER_CACHE_SIZE:
+            _token_versions.clear()
+        _token_versions[user_id] = (
+            version, now + settings.JWT_USER_CACHE_TTL
+        )
+    return version
+
+
+def revoke_tokens(user):
+    """Отзывает выпущенные токены пользователя."""
+    User.objects.filter(pk=user.pk).update(
+        token_version=F('token_version') + 1
+    )
+    with _token_versions_lock:
+        _token_versions.pop(user.pk, None)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Строит пользователя по подписанным данным токена
+    без запроса к таблице пользователей.
+
+    Отзыв токенов проверяется по версии из кэша процесса,
+    который живёт JWT_USER_CACHE_TTL секунд.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        version = get_token_version(user_id)
+        if version is None or version != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return User(
+            id=user_id,
+            username=validated_token['username'],
+            role=validated_token['role'],
+            is_superuser=validated_token['is_superuser'],
+            token_version=version
+        )
@@ -0,0 +1,180 @@
+from django.conf import settings
+from django.db import connection, transaction
+from reviews.models import Category, Genre, Title, TitleGenre
+from reviews.signals import schedule_summary_rebuild
+
+from .serializers import TitleBulkItemSerializer
+
+TITLE_FIELDS = ('name', 'year', 'description')
+
+
+def _slug_map(model, slugs):
+    if not slugs:
+        return {}
+    return dict(
+        model.objects.filter(slug__in=slugs).values_list('slug', 'id')
+    )
+
+
+def _validate(items, partial):
+    errors, valid = {}, []
+    for index, item in enumerate(items):
+        serializer = TitleBulkItemSerializer(data=item, partial=partial)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    return errors, valid
+
+
+def _resolve(valid, errors):
+    """Проверяет slug жанров и категорий одним запросом на модель."""
+    categories = _slug_map(Category, {
+        data['category'] for _, data in valid if 'category' in data
+    })
+    genres = _slug_map(Genre, {
+        slug for _, data in valid for slug in data.get('genre', ())
+    })
+    resolved = []
+    for index, data in valid:
+        item_errors = {}
+        if 'category' in data and data['category'] not in categories:
+            item_errors['category'] = [
+                f'Категория {data["category"]} не найдена.'
+            ]
+        missing = [
+            slug for slug in data.get('genre', ()) if slug not in genres
+        ]
+        if missing:
+            item_errors['genre'] = [
+                f'Жанр {slug} не найден.' for slug in missing
+            ]
+        if item_errors:
+            errors[index] = item_errors
+        else:
+            resolved.append((index, data))
+    return resolved, categories, genres
+
+
+def _represent(title, category_slug, genre_slugs):
+    return {
+        'id': title.pk,
+        'name': title.name,
+        'year': title.year,
+        'description': title.description,
+        'genre': list(genre_slugs),
+        'category': category_slug,
+    }
+
+
+def _create(resolved, categories, genres):
+    titles = [
+        Title(
+            name=data['name'],
+            year=data['year'],
+            description=data.get('description', ''),
+            category_id=categories[data['category']]
+        )
+        for _, data in resolved
+    ]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Title.objects.bulk_create(
+            titles, batch_size=settings.TITLE_BULK_BATCH_SIZE
+        )
+    else:
+        for title in titles:
+            title.save()
+    TitleGenre.objects.bulk_create(
+        [
+            TitleGenre(title=title, genre_id=genres[slug])
+            for title, (_, data) in zip(titles, resolved)
+            for slug in dict.fromkeys(data['genre'])
+        ],
+        batch_size=settings.TITLE_BULK_BATCH_SIZE
+    )
+    return {
+        index: _represent(title, data['category'], data['genre'])
+        for title, (index, data) in zip(titles, resolved)
+    }
+
+
+def _current_genres(title_ids):
+    current = {title_id: [] for title_id in title_ids}
+    for title_id, slug in TitleGenre.objects.filter(
+        title_id__in=title_ids
+    ).values_list('title_id', 'genre__slug'):
+        current[title_id].append(slug)
+    return current
+
+
+def _update(resolved, categories, genres, errors):
+    existing = Title.objects.alive().select_related('category').in_bulk(
+        [data['id'] for _, data in resolved]
+    )
+    changed, fields, regenre = [], set(), {}
+    for index, data in resolved:
+        title = existing.get(data['id'])
+        if title is None:
+            errors[index] = {'id': [f'Произведение {data["id"]} не найдено.']}
+            continue
+        for name in TITLE_FIELDS:
+            if name in data:
+                setattr(title, name, data[name])
+                fields.add(name)
+        if 'category' in data:
+            title.category_id = categories[data['category']]
+            fields.add('category')
+        if 'genre' in data:
+            regenre[title.pk] = list(dict.fromkeys(data['genre']))
+        changed.append((index, title, data))
+    if not changed:
+        return {}
+    if fields:
+        Title.objects.bulk_update(
+            [title for _, title, _ in changed], fields,
+            batch_size=settings.TITLE_BULK_BATCH_SIZE
+        )
+    if regenre:
+        TitleGenre.objects.filter(title_id__in=regenre).delete()
+        TitleGenre.objects.bulk_create(
+            [
+                TitleGenre(title_id=title_id, genre_id=genres[slug])
+                for title_id, slugs in regenre.items() for slug in slugs
+            ],
+            batch_size=settings.TITLE_BULK_BATCH_SIZE
+        )
+    title_ids = [title.pk for _, title, _ in changed]
+    Title.objects.filter(pk__in=title_ids).touch()
+    current = _current_genres(
+        [pk for pk in title_ids if pk not in regenre]
+    )
+    current.update(regenre)
+    return {
+        index: _represent(
+            title,
+            data.get('category') or getattr(title.category, 'slug', None),
+            current[title.pk]
+        )
+        for index, title, data in changed
+    }
+
+
+def bulk_save_titles(items, partial=False):
+    """
+    Создаёт или изменяет произведения пакетом в одной транзакции.
+
+    Ошибочные элементы не прерывают пакет: для каждого элемента
+    возвращается либо созданный объект, либо его ошибки.
+    """
+    errors, valid = _validate(items, partial)
+    resolved, categories, genres = _resolve(valid, errors)
+    with transaction.atomic():
+        if partial:
+            saved = _update(resolved, categories, genres, errors)
+        else:
+            saved = _create(resolved, categories, genres)
+        schedule_summary_rebuild(result['id'] for result in saved.values())
+    return [
+        {'errors': errors[index]} if index in errors else saved[index]
+        for index in range(len(items))
+    ]
@@ -0,0 +1,42 @@
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+CATEGORY_CACHE_PREFIX = 'categories'
+GENRE_CACHE_PREFIX = 'genres'
+
+
+def generation_key(prefix):
+    return f'{prefix}:generation'
+
+
+def get_generation(prefix):
+    """
+    Текущее поколение кэша для префикса.
+    Если счётчик вытеснен из кэша, начинается новое поколение,
+    чтобы не отдать записи, сохранённые до вытеснения.
+    """
+    key = generation_key(prefix)
+    generation = cache.get(key)
+    if generation is not None:
+        return generation
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def bump_generation(prefix):
+    """Делает недействительными все записи кэша с этим префиксом."""
+    key = generation_key(prefix)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def request_cache_key(prefix, request):
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return (
+        f'{prefix}:{get_generation(prefix)}:'
+        f'{request.get_host()}:{request.path}?{params}'
+    )
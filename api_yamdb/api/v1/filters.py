@@ -1,23 +1,95 @@
 import django_filters
-from reviews.models import Title
+from django.db.models import Exists, OuterRef, Subquery
+from reviews.models import Category, Title, TitleGenre, TitleSummary
+
+ANY = 'any'
+ALL = 'all'
+SEARCH_PARAM = 'q'
+
+
+def split_slugs(value):
+    """Разбирает список slug, перечисленных через запятую."""
+    return list(dict.fromkeys(
+        slug.strip() for slug in value.split(',') if slug.strip()
+    ))
 
 
 class TitleFilter(django_filters.FilterSet):
     """Класс, фильтрующий различные поля модели."""
 
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='contains'
-    )
-    category = django_filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='contains'
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=((ANY, 'Любой из жанров'), (ALL, 'Все жанры')),
+        method='filter_noop'
     )
+    category = django_filters.CharFilter(method='filter_category')
     name = django_filters.CharFilter(
         field_name='name',
         lookup_expr='contains'
     )
+    q = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['year', 'genre', 'category', 'name']
+        fields = ['year', 'genre', 'genre_mode', 'category', 'name', 'q']
+
+    def filter_genre(self, queryset, name, value):
+        """
+        Отбирает произведения по точным slug жанров через EXISTS,
+        поэтому произведения в выдаче не повторяются.
+        """
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        title_genres = TitleGenre.objects.filter(title=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_mode') == ALL:
+            for slug in slugs:
+                queryset = queryset.filter(
+                    Exists(title_genres.filter(genre__slug=slug))
+                )
+            return queryset
+        return queryset.filter(
+            Exists(title_genres.filter(genre__slug__in=slugs))
+        )
+
+    def filter_category(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(
+            category__in=Category.objects.filter(slug__in=slugs)
+        )
+
+    def filter_noop(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+
+class TitleSummaryFilter(TitleFilter):
+    """
+    Те же фильтры для сводки произведений: категория сравнивается
+    по сохранённому slug, поиск отбирает произведения по id
+    и сортирует их по рангу из Title.objects.search.
+    """
+
+    class Meta(TitleFilter.Meta):
+        model = TitleSummary
+
+    def filter_category(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(category_slug__in=slugs)
+
+    def filter_search(self, queryset, name, value):
+        titles = Title.objects.search(value)
+        if 'search_rank' not in titles.query.annotations:
+            return queryset
+        rank = titles.filter(pk=OuterRef('title_id')).order_by()
+        return queryset.filter(
+            pk__in=titles.order_by().values('pk')
+        ).annotate(
+            search_rank=Subquery(rank.values('search_rank')[:1])
+        ).order_by('-search_rank', 'name', 'pk')
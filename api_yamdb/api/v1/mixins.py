@@ -1,11 +1,186 @@
+import hashlib
+
+from api.executor import async_view
+from api.metrics import current_metrics, timed_serializer_class
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin, RetrieveModelMixin)
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from .cache import request_cache_key
+from .planner import plan_queryset
+from .serializers import EXPAND_PARAM, FIELDS_PARAM, parse_names
+
+
+class AsyncViewMixin:
+    """
+    При ASYNC_VIEWS (включается в asgi.py) отдаёт асинхронное
+    представление: запрос выполняется в ограниченном пуле потоков,
+    и медленный запрос к БД не держит ни воркер, ни общий поток Django.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+        return async_view(view)
+
+
+class ReadPlanMixin:
+    """
+    Подгружает связанные объекты, нужные сериализатору,
+    при чтении списка и отдельного объекта.
+    """
+
+    read_actions = ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.read_actions:
+            return queryset
+        return plan_queryset(queryset, self.get_serializer())
+
+
+class SerializerTimingMixin:
+    """Учитывает время сериализации в метриках запроса, если они включены."""
+
+    def get_serializer(self, *args, **kwargs):
+        if current_metrics() is None:
+            return super().get_serializer(*args, **kwargs)
+        serializer_class = timed_serializer_class(
+            self.get_serializer_class()
+        )
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class StreamingListMixin:
+    """
+    Большие страницы списка отдаёт потоком, если рендерер это умеет:
+    объекты сериализуются и кодируются пачками по мере отправки,
+    и ни список словарей, ни весь JSON не собираются в памяти.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        items = queryset if page is None else page
+        serializer = self.get_serializer(items, many=True)
+        renderer = request.accepted_renderer
+        if (
+            not hasattr(renderer, 'render_stream')
+            or len(items) < settings.JSON_STREAM_MIN_ITEMS
+        ):
+            if page is None:
+                return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
+        if page is None:
+            data, key = None, None
+        else:
+            data, key = self.get_paginated_response([]).data, 'results'
+        return StreamingHttpResponse(
+            renderer.render_stream(data, key, (
+                serializer.child.to_representation(item) for item in items
+            )),
+            content_type=renderer.media_type
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 на If-None-Match и If-Modified-Since по версии
+    объекта до выполнения основных запросов и сериализации.
+
+    ETag учитывает ?fields= и ?expand=, а у списков и остальные
+    параметры (limit, offset, cursor). Связи из unversioned_expansions
+    не меняют версию ресурса, поэтому с ними ответ не условный.
+    """
+
+    unversioned_expansions = ()
+
+    def get_conditional_version(self):
+        """
+        Возвращает (ключ, версия, время изменения) ресурса
+        или None, если условный запрос не поддерживается.
+        """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_variant(self, request):
+        """Хеш параметров запроса, от которых зависит тело ответа."""
+        parts = []
+        for param in (FIELDS_PARAM, EXPAND_PARAM):
+            names = parse_names(request, param)
+            if names is not None:
+                parts.append((param, sorted(names)))
+        if self.action == 'list':
+            parts.extend(
+                (param, values)
+                for param, values in sorted(request.query_params.lists())
+                if param not in (FIELDS_PARAM, EXPAND_PARAM)
+            )
+        if not parts:
+            return None
+        return hashlib.md5(repr(parts).encode()).hexdigest()[:12]
+
+    def conditional(self, handler, request, *args, **kwargs):
+        expand = parse_names(request, EXPAND_PARAM) or set()
+        version = None
+        if expand.isdisjoint(self.unversioned_expansions):
+            version = self.get_conditional_version()
+        if version is None:
+            return handler(request, *args, **kwargs)
+        key, number, modified = version
+        tag = f'{key}-{number}-{request.accepted_renderer.format}'
+        variant = self.get_conditional_variant(request)
+        if variant is not None:
+            tag = f'{tag}-{variant}'
+        etag = quote_etag(tag)
+        last_modified = int(modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            response['Last-Modified'] = http_date(last_modified)
+        response['ETag'] = etag
+        return response
+
+
+class CachedListMixin:
+    """
+    Кэширует ответы list с учётом параметров запроса.
+    Записи модели сбрасывают кэш через счётчик поколений.
+    """
+
+    list_cache_prefix = None
+    list_cache_timeout = settings.LIST_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        key = request_cache_key(self.list_cache_prefix, request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, self.list_cache_timeout)
+        return response
+
 
 class CategoryGenreModelMixin(
+    CachedListMixin,
+    SerializerTimingMixin,
+    ReadPlanMixin,
     CreateModelMixin,
     ListModelMixin,
     DestroyModelMixin,
@@ -17,6 +192,9 @@ class CategoryGenreModelMixin(
 
 
 class ModelViewSetWithoutPUT(
+    StreamingListMixin,
+    SerializerTimingMixin,
+    ReadPlanMixin,
     CreateModelMixin,
     ListModelMixin,
     RetrieveModelMixin,
@@ -0,0 +1,56 @@
+from django.db.models import F
+from rest_framework.filters import OrderingFilter
+
+TIEBREAKER = 'pk'
+
+
+def get_ordering_field(model, name):
+    opts = model._meta
+    return opts.pk if name == TIEBREAKER else opts.get_field(name)
+
+
+def order_by_expressions(model, ordering):
+    """
+    Превращает имена полей сортировки в аргументы order_by.
+
+    NULL считается наименьшим значением: по убыванию такие записи
+    идут последними, по возрастанию — первыми.
+    """
+    expressions = []
+    for name in ordering:
+        field_name = name.lstrip('-')
+        if not get_ordering_field(model, field_name).null:
+            expressions.append(name)
+        elif name.startswith('-'):
+            expressions.append(F(field_name).desc(nulls_last=True))
+        else:
+            expressions.append(F(field_name).asc(nulls_first=True))
+    return expressions
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка по ?ordering= с первичным ключом в конце,
+    чтобы порядок был однозначным и подходил для выдачи по ключу.
+    Ключ сортируется в том же направлении, что и первое поле,
+    поэтому обе стороны сортировки обслуживает один индекс.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or ())
+        if not ordering:
+            return ordering
+        if TIEBREAKER not in (name.lstrip('-') for name in ordering):
+            descending = ordering[0].startswith('-')
+            ordering.append(f'-{TIEBREAKER}' if descending else TIEBREAKER)
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param):
+            return queryset
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(
+            *order_by_expressions(queryset.model, ordering)
+        )
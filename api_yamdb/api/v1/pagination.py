@@ -0,0 +1,249 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, F, Func, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .ordering import get_ordering_field, order_by_expressions
+
+KEYSET = 'keyset'
+LIMIT_OFFSET = 'limit_offset'
+MAX_LIMIT = 1000
+
+
+class RowComparison(Func):
+    """
+    Сравнение строк (a, b, ...) > (x, y, ...) одним условием,
+    которое база обслуживает диапазоном по составному индексу.
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, columns, values, operator):
+        super().__init__(*columns, *values)
+        self.operator = operator
+
+    def as_sql(self, compiler, connection):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, sql_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(sql_params)
+        size = len(sqls) // 2
+        columns, values = ', '.join(sqls[:size]), ', '.join(sqls[size:])
+        return f'({columns}) {self.operator} ({values})', params
+
+
+class CappedLimitOffsetPagination(LimitOffsetPagination):
+    """Limit/offset с тем же потолком ?limit=, что и выдача по ключу."""
+
+    max_limit = MAX_LIMIT
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничная выдача по ключу сортировки.
+
+    Страница выбирается условием на поля сортировки вместо OFFSET,
+    поэтому глубокие страницы и подсчёт COUNT(*) не нужны.
+    Порядок задаётся атрибутом представления keyset_ordering
+    и должен заканчиваться уникальным полем.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = MAX_LIMIT
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        self.ordering = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in view.keyset_ordering
+        ]
+        self.fields = [
+            get_ordering_field(queryset.model, name)
+            for name, _ in self.ordering
+        ]
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['reverse']
+        queryset = queryset.order_by(*order_by_expressions(
+            queryset.model, self.get_order_by(reverse)
+        ))
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(cursor['position'], reverse)
+            )
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def get_order_by(self, reverse):
+        return [
+            name if descending == reverse else f'-{name}'
+            for name, descending in self.ordering
+        ]
+
+    def get_position_filter(self, position, reverse):
+        """
+        Условие «строго после позиции» для составного ключа.
+        Если поля без NULL и сортируются в одном направлении,
+        это сравнение строк (a, b) > (x, y), иначе развёрнутое
+        (a > x) OR (a = x AND b > y) OR ..., где NULL, как и при
+        сортировке, считается наименьшим значением.
+        """
+        directions = {descending for _, descending in self.ordering}
+        if len(directions) == 1 and not any(
+            field.null for field in self.fields
+        ):
+            return RowComparison(
+                [F(name) for name, _ in self.ordering],
+                [
+                    Value(value, output_field=field)
+                    for field, value in zip(self.fields, position)
+                ],
+                '<' if directions.pop() != reverse else '>',
+            )
+        condition = Q()
+        equal = Q()
+        for (name, descending), field, value in zip(
+            self.ordering, self.fields, position
+        ):
+            after = self.get_after_filter(
+                name, field, value, smaller=descending != reverse
+            )
+            if after is not None:
+                condition |= equal & after
+            if value is None:
+                equal &= Q(**{f'{name}__isnull': True})
+            else:
+                equal &= Q(**{name: value})
+        return condition
+
+    def get_after_filter(self, name, field, value, smaller):
+        if value is None:
+            return None if smaller else Q(**{f'{name}__isnull': False})
+        if not smaller:
+            return Q(**{f'{name}__gt': value})
+        if field.null:
+            return Q(**{f'{name}__lt': value}) | Q(**{f'{name}__isnull': True})
+        return Q(**{f'{name}__lt': value})
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'r': reverse,
+            'p': [
+                None if field.value_from_object(instance) is None
+                else field.value_to_string(instance)
+                for field in self.fields
+            ],
+        }
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode()
+        ).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position = [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, payload['p'])
+            ]
+            if len(position) != len(self.fields):
+                raise ValueError
+            return {'reverse': bool(payload['r']), 'position': position}
+        except (
+            binascii.Error, KeyError, TypeError, ValueError, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class SwitchablePagination(BasePagination):
+    """
+    Выбирает между limit/offset и постраничной выдачей по ключу.
+
+    Режим по ключу включается параметром ?pagination=keyset,
+    наличием параметра cursor или атрибутом представления
+    pagination_mode; иначе ответ остаётся прежним limit/offset.
+    """
+
+    mode_query_param = 'pagination'
+
+    def get_mode(self, request, view):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in (KEYSET, LIMIT_OFFSET):
+            return mode
+        if request.query_params.get(KeysetPagination.cursor_query_param):
+            return KEYSET
+        return getattr(view, 'pagination_mode', LIMIT_OFFSET)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_mode(request, view) == KEYSET:
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = CappedLimitOffsetPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
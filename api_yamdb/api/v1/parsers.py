@@ -0,0 +1,31 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    Разбирает JSON через orjson, если он установлен. Тело, которое
+    orjson не принял, разбирает JSONParser DRF: он же формирует
+    привычное сообщение об ошибке.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        content = stream.read()
+        try:
+            if encoding.lower().replace('-', '') == 'utf8':
+                return orjson.loads(content)
+            return orjson.loads(content.decode(encoding))
+        except ValueError:
+            return super().parse(
+                io.BytesIO(content), media_type, parser_context
+            )
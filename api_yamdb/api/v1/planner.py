@@ -0,0 +1,130 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+_plans = {}
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _is_forward_single(model_field):
+    return (
+        model_field.is_relation
+        and (model_field.many_to_one or model_field.one_to_one)
+        and model_field.concrete
+    )
+
+
+def _plan_field(field, model_field, path):
+    if isinstance(field, serializers.ListSerializer):
+        queryset = model_field.related_model._default_manager.all()
+        if isinstance(field.child, serializers.ModelSerializer):
+            queryset = plan_queryset(queryset, field.child)
+        return [], [Prefetch(path, queryset=queryset)]
+    if isinstance(field, ManyRelatedField):
+        return [], [path]
+    if isinstance(field, serializers.ModelSerializer):
+        if not _is_forward_single(model_field):
+            return [], [path]
+        select, prefetch = _build_plan(field, path + LOOKUP_SEP)
+        return [path] + select, prefetch
+    if (
+        isinstance(field, RelatedField)
+        and not field.use_pk_only_optimization()
+    ):
+        if _is_forward_single(model_field):
+            return [path], []
+        return [], [path]
+    return [], []
+
+
+def _build_plan(serializer, prefix=''):
+    """
+    Обходит поля сериализатора и собирает пути для
+    select_related и prefetch_related.
+    """
+    select, prefetch = [], []
+    model = serializer.Meta.model
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        name = field.source.split('.')[0]
+        model_field = _model_field(model, name)
+        if model_field is None or not model_field.is_relation:
+            continue
+        field_select, field_prefetch = _plan_field(
+            field, model_field, prefix + name
+        )
+        select.extend(field_select)
+        prefetch.extend(field_prefetch)
+    return select, prefetch
+
+
+def _deferred_fields(serializer):
+    """
+    Колонки модели, которые не читает ни одно поле сериализатора.
+    Пусто, если поле-метод не описало свои колонки в field_columns.
+    Внешние ключи не откладываются: по ним Django связывает объекты.
+    """
+    model = serializer.Meta.model
+    field_columns = getattr(serializer, 'field_columns', {})
+    used = set()
+    for name, field in serializer.fields.items():
+        if field.source == '*':
+            if name not in field_columns:
+                return ()
+            used.update(field_columns[name])
+        else:
+            used.add(field.source.split('.')[0])
+    return tuple(
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and not field.is_relation
+        and field.name not in used
+    )
+
+
+def _ordering_names(queryset):
+    names = set()
+    for item in queryset.query.order_by:
+        expression = getattr(item, 'expression', None)
+        if expression is not None:
+            item = getattr(expression, 'name', '')
+        if isinstance(item, str):
+            names.add(item.lstrip('-').split(LOOKUP_SEP)[0])
+    return names
+
+
+def plan_queryset(queryset, serializer):
+    """
+    Добавляет в queryset select_related и prefetch_related,
+    которые нужны вложенным полям сериализатора, чтобы число
+    запросов не зависело от размера страницы, и откладывает
+    колонки, которые сериализатор не читает.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return queryset
+    key = (type(serializer), tuple(
+        (name, type(field)) for name, field in serializer.fields.items()
+    ))
+    if key not in _plans:
+        _plans[key] = (*_build_plan(serializer), _deferred_fields(serializer))
+    select, prefetch, deferred = _plans[key]
+    if select:
+        queryset = queryset.select_related(*select)
+    if deferred:
+        ordering = _ordering_names(queryset)
+        queryset = queryset.defer(
+            *(name for name in deferred if name not in ordering)
+        )
+    if prefetch:
+        return queryset.prefetch_related(*prefetch)
+    return queryset
@@ -0,0 +1,80 @@
+from itertools import islice
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Рендерер JSON на orjson, если он установлен, иначе стандартный
+    рендерер DRF. Даты и время orjson кодирует сам в том же формате,
+    что и поля DRF, а Decimal, ленивые строки и прочие типы передаёт
+    кодировщику DRF. Ответ с отступами рендерит DRF.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else 0
+    stream_chunk_size = settings.JSON_STREAM_CHUNK_SIZE
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if data is None:
+            return b''
+        return self.encode(data)
+
+    def encode(self, data):
+        if orjson is None:
+            return super().render(data)
+        content = orjson.dumps(
+            data, default=_encoder.default, option=self.options
+        )
+        # Как и JSONRenderer, экранирует символы, недопустимые
+        # в строках JavaScript.
+        if b'\xe2\x80' in content:
+            for character, escaped in LINE_SEPARATORS:
+                content = content.replace(character, escaped)
+        return content
+
+    def render_stream(self, data, key, items):
+        """
+        Выдаёт JSON частями: data с заменённым на items списком
+        под ключом key (или сам список, если key равен None).
+        Элементы кодируются пачками по мере чтения items.
+        """
+        if key is None:
+            prefix, suffix = b'[', b']'
+        else:
+            head = self.encode(
+                {name: value for name, value in data.items() if name != key}
+            )
+            prefix = b'%s%s%s:[' % (
+                head[:-1], b',' if len(head) > 2 else b'', self.encode(key)
+            )
+            suffix = b']}'
+        yield prefix
+        items = iter(items)
+        separator = b''
+        while True:
+            chunk = list(islice(items, self.stream_chunk_size))
+            if not chunk:
+                break
+            yield separator + self.encode(chunk)[1:-1]
+            separator = b','
+        yield suffix
@@ -1,12 +1,90 @@
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import serializers
-from reviews.models import Category, Comments, Genre, Review, Title
+from rest_framework.permissions import SAFE_METHODS
+from reviews.models import (SCORE_FIELDS, Category, Comments, Genre, Review,
+                            Title, TitleSummary)
 
 User = get_user_model()
 
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_names(request, param):
+    """Имена из параметра запроса через запятую или None."""
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    При чтении оставляет только поля из ?fields= и отдаёт связи
+    из ?expand= вложенными объектами. Если expand передан, остальные
+    связи из expandable_fields отдаются кратко, по slug. Поля
+    из optional_fields добавляются в ответ, только если указаны в expand.
+
+    expandable_fields: имя -> (краткое поле, вложенное поле).
+    optional_fields: имя -> поле.
+    field_columns: колонки модели, которые читают поля-методы;
+    по ним планировщик запросов откладывает ненужные колонки.
+    """
+
+    expandable_fields = {}
+    optional_fields = {}
+    field_columns = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not self.is_response_root()
+        ):
+            return fields
+        expand = parse_names(request, EXPAND_PARAM)
+        if expand is not None:
+            self.check_names(
+                EXPAND_PARAM, expand,
+                {**self.expandable_fields, **self.optional_fields}
+            )
+            for name, (compact, expanded) in self.expandable_fields.items():
+                if name in fields:
+                    fields[name] = expanded() if name in expand else compact()
+            for name, field_class in self.optional_fields.items():
+                if name in expand:
+                    fields[name] = field_class()
+        only = parse_names(request, FIELDS_PARAM)
+        if only is None:
+            return fields
+        self.check_names(FIELDS_PARAM, only, fields)
+        return OrderedDict(
+            (name, field) for name, field in fields.items() if name in only
+        )
+
+    def is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def check_names(self, param, names, known):
+        unknown = sorted(names.difference(known))
+        if unknown:
+            raise serializers.ValidationError(
+                {param: f'Неизвестные поля: {", ".join(unknown)}.'}
+            )
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для User."""
@@ -46,12 +124,26 @@ class UserSerializer(serializers.ModelSerializer):
         return super().validate(data)
 
 
-class SignSerializer(UserSerializer):
-    """Сериализатор для регистрации."""
+class SignSerializer(serializers.Serializer):
+    """
+    Сериализатор для регистрации.
 
-    class Meta(UserSerializer.Meta):
-        fields = ('email', 'username')
-        model = User
+    Уникальность username и email проверяет не сериализатор,
+    а представление вместе с ограничениями базы данных.
+    """
+
+    email = serializers.EmailField(max_length=settings.EMAIL_MAX_LENGTH)
+    username = serializers.CharField(
+        max_length=settings.USERNAME_MAX_LENGTH,
+        validators=[UnicodeUsernameValidator()]
+    )
+
+    def validate_username(self, value):
+        if value == 'me':
+            raise serializers.ValidationError(
+                'Имя пользователя не может быть me.'
+            )
+        return value
 
 
 class GetTokenSerializer(serializers.Serializer):
@@ -77,13 +169,97 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class ScoreDistributionField(serializers.Field):
+    """Число отзывов по оценкам из сохранённых счётчиков."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return {
+            str(score): count
+            for score, count in value.score_distribution.items()
+        }
+
+
+SCORE_DISTRIBUTION_EXPANSION = {'score_distribution': ScoreDistributionField}
+SCORE_DISTRIBUTION_COLUMNS = {'score_distribution': SCORE_FIELDS}
+
+
+class TitleGetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для чтения Title."""
 
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
 
+    expandable_fields = {
+        'genre': (
+            partial(
+                serializers.SlugRelatedField,
+                slug_field='slug', many=True, read_only=True
+            ),
+            partial(GenreSerializer, many=True, read_only=True),
+        ),
+        'category': (
+            partial(
+                serializers.SlugRelatedField,
+                slug_field='slug', read_only=True
+            ),
+            partial(CategorySerializer, read_only=True),
+        ),
+    }
+    optional_fields = SCORE_DISTRIBUTION_EXPANSION
+    field_columns = SCORE_DISTRIBUTION_COLUMNS
+
+    class Meta:
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category'
+        )
+        model = Title
+
+
+class TitleSummarySerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    """Сериализатор для чтения Title из сводки произведений."""
+
+    id = serializers.IntegerField(source='title_id', read_only=True)
+    genre = serializers.JSONField(source='genres', read_only=True)
+    category = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
+
+    expandable_fields = {
+        'genre': (
+            partial(
+                serializers.SerializerMethodField,
+                method_name='get_genre_slugs'
+            ),
+            partial(serializers.JSONField, source='genres', read_only=True),
+        ),
+        'category': (
+            partial(
+                serializers.SerializerMethodField,
+                method_name='get_category_slug'
+            ),
+            serializers.SerializerMethodField,
+        ),
+    }
+    optional_fields = SCORE_DISTRIBUTION_EXPANSION
+    field_columns = {
+        'genre': ('genres',),
+        'category': ('category_name', 'category_slug'),
+        **SCORE_DISTRIBUTION_COLUMNS,
+    }
+
     class Meta:
         fields = (
             'id',
@@ -94,6 +270,30 @@ class TitleGetSerializer(serializers.ModelSerializer):
             'genre',
             'category'
         )
+        model = TitleSummary
+
+    def get_category(self, obj):
+        if not obj.category_slug:
+            return None
+        return {'name': obj.category_name, 'slug': obj.category_slug}
+
+    def get_category_slug(self, obj):
+        return obj.category_slug or None
+
+    def get_genre_slugs(self, obj):
+        return [genre['slug'] for genre in obj.genres]
+
+
+class TitleScoreDistributionSerializer(serializers.ModelSerializer):
+    """Сериализатор распределения оценок произведения."""
+
+    rating = serializers.IntegerField(read_only=True)
+    distribution = ScoreDistributionField()
+
+    field_columns = {'distribution': SCORE_FIELDS}
+
+    class Meta:
+        fields = ('id', 'rating', 'review_count', 'distribution')
         model = Title
 
 
@@ -123,7 +323,48 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkItemSerializer(serializers.Serializer):
+    """Сериализатор элемента пакетного создания и изменения Title."""
+
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(
+        max_length=Title._meta.get_field('name').max_length
+    )
+    year = serializers.IntegerField(
+        validators=Title._meta.get_field('year').validators
+    )
+    description = serializers.CharField(allow_blank=True, required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    def validate(self, data):
+        if self.partial and 'id' not in data:
+            raise serializers.ValidationError(
+                {'id': 'Обязательное поле при изменении.'}
+            )
+        return data
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    """Автор отзыва или комментария при ?expand=author."""
+
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name', 'bio')
+
+
+AUTHOR_EXPANSION = {
+    'author': (
+        partial(
+            serializers.SlugRelatedField,
+            slug_field='username', read_only=True
+        ),
+        partial(AuthorSerializer, read_only=True),
+    ),
+}
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериалайзер для отзывов."""
 
     author = serializers.SlugRelatedField(
@@ -131,6 +372,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    expandable_fields = AUTHOR_EXPANSION
+
     class Meta:
         model = Review
         fields = (
@@ -148,7 +391,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context['request']
         author = request.user
         title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
+        title = get_object_or_404(Title.objects.alive(), pk=title_id)
         if (
             request.method == 'POST'
             and Review.objects.filter(title=title, author=author).exists()
@@ -157,7 +400,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериалайзер для комментариев."""
 
     author = serializers.SlugRelatedField(
@@ -165,6 +408,8 @@ class CommentsSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    expandable_fields = AUTHOR_EXPANSION
+
     class Meta:
         model = Comments
         fields = (
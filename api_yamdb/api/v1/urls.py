@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    GetTokenView, ReviewViewSet, SignView, TitleViewSet,
-                    UserViewSet)
+from .views import (CategoryViewSet, CommentViewSet, DatabaseStatsView,
+                    GenreViewSet, GetTokenView, MetricsView, ReviewViewSet,
+                    SignView, TitleViewSet, UserViewSet)
 
 router_v1 = DefaultRouter()
 
@@ -29,4 +29,6 @@ auth_urlpatterns = [
 urlpatterns = [
     path('', include(router_v1.urls)),
     path('auth/', include(auth_urlpatterns)),
+    path('_metrics/', MetricsView.as_view(), name='metrics'),
+    path('_db/', DatabaseStatsView.as_view(), name='database-stats'),
 ]
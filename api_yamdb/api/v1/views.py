@@ -1,35 +1,52 @@
+from api.db.health import health_stats
+from api.db.pool import pool_stats
+from api.metrics import endpoint_stats
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import Category, Genre, Review, Title, TitleSummary
 from users.models import User
 
-from .filters import TitleFilter
-from .mixins import CategoryGenreModelMixin, ModelViewSetWithoutPUT
+from .authentication import issue_access_token, revoke_tokens
+from .bulk import bulk_save_titles
+from .cache import CATEGORY_CACHE_PREFIX, GENRE_CACHE_PREFIX
+from .filters import SEARCH_PARAM, TitleFilter, TitleSummaryFilter
+from .mixins import (AsyncViewMixin, CategoryGenreModelMixin,
+                     ConditionalGetMixin, ModelViewSetWithoutPUT)
+from .ordering import StableOrderingFilter
+from .pagination import SwitchablePagination
 from .permissions import (AdminModeratorAuthorReadOnly, AdminOnly,
                           IsAdminOrReadOnly)
 from .serializers import (CategorySerializer, CommentsSerializer,
                           GenreSerializer, GetTokenSerializer,
                           ReviewSerializer, SignSerializer,
                           TitleCreateSerializer, TitleGetSerializer,
-                          UserSerializer)
+                          TitleScoreDistributionSerializer,
+                          TitleSummarySerializer, UserSerializer)
 from .utils import send_confirmation_code
 
+TOKEN_USER_FIELDS = (
+    'username', 'email', 'password', 'last_login',
+    'role', 'is_superuser', 'token_version', 'is_deleted'
+)
+
 
 class UserViewSet(ModelViewSetWithoutPUT):
     """
     Вьюсет модели User.
     """
 
-    queryset = User.objects.all()
+    queryset = User.objects.filter(is_deleted=False)
     serializer_class = UserSerializer
     permission_classes = (AdminOnly,)
     lookup_field = 'username'
@@ -43,7 +60,7 @@ class UserViewSet(ModelViewSetWithoutPUT):
         url_path='me'
     )
     def get_current_user_info(self, request):
-        user = request.user
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'PATCH':
             serializer = self.get_serializer(
                 user,
@@ -51,11 +68,16 @@ class UserViewSet(ModelViewSetWithoutPUT):
                 partial=True
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
         else:
             serializer = self.get_serializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def perform_destroy(self, instance):
+        # Отзывы, комментарии и запись удаляет purge_deleted.
+        instance.mark_deleted()
+        revoke_tokens(instance)
+
 
 class SignView(APIView):
     """
@@ -66,27 +88,51 @@ class SignView(APIView):
     permission_classes = (permissions.AllowAny,)
 
     def post(self, request):
-        serializer = SignSerializer(data=request.data, partial=True)
-        if User.objects.filter(
-            username=request.data.get('username'),
-            email=request.data.get('email')
-        ).exists():
-            user = User.objects.get(
-                username=request.data.get('username')
-            )
+        serializer = SignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        username = serializer.validated_data['username']
+        email = serializer.validated_data['email']
+        users = list(
+            User.objects.filter(
+                Q(username=username) | Q(email=email)
+            ).only(*TOKEN_USER_FIELDS)[:2]
+        )
+        if not users:
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(
+                        username=username, email=email
+                    )
+            except IntegrityError:
+                users = list(
+                    User.objects.filter(
+                        Q(username=username) | Q(email=email)
+                    ).only(*TOKEN_USER_FIELDS)[:2]
+                )
+            else:
+                send_confirmation_code(user)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+            if not users:
+                # Конфликтующая запись исчезла между INSERT и чтением.
+                return Response(
+                    {'detail': 'Не удалось зарегистрироваться, повторите.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+        user = users[0]
+        if len(users) == 1 and not user.is_deleted and (
+            user.username, user.email
+        ) == (username, email):
             send_confirmation_code(user)
             return Response(
                 {'confirmation_code': 'код подтверждения обновлен'},
                 status=status.HTTP_200_OK
             )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        user = User.objects.get(
-            username=serializer.data['username'],
-            email=request.data['email']
-        )
-        send_confirmation_code(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        errors = {}
+        if any(user.username == username for user in users):
+            errors['username'] = ['Это имя пользователя уже занято.']
+        if any(user.email == email for user in users):
+            errors['email'] = ['Этот email уже используется!']
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class GetTokenView(APIView):
@@ -101,11 +147,14 @@ class GetTokenView(APIView):
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data.get('username')
         confirmation_code = serializer.validated_data['confirmation_code']
-        user = get_object_or_404(User, username=username)
+        user = get_object_or_404(
+            User.objects.filter(is_deleted=False).only(*TOKEN_USER_FIELDS),
+            username=username
+        )
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = issue_access_token(user)
             return Response(
-                {'token': token},
+                {'token': str(token)},
                 status=status.HTTP_200_OK
             )
         return Response(
@@ -119,30 +168,55 @@ class GetTokenView(APIView):
         )
 
 
-class ReviewViewSet(ModelViewSetWithoutPUT):
+class ReviewViewSet(
+    AsyncViewMixin, ConditionalGetMixin, ModelViewSetWithoutPUT
+):
     """Вьюсет для отзывов."""
 
     serializer_class = ReviewSerializer
     permission_classes = [
         AdminModeratorAuthorReadOnly,
     ]
+    pagination_class = SwitchablePagination
+    keyset_ordering = ('-pub_date', 'id')
+    # Профиль автора меняется без новой версии отзыва.
+    unversioned_expansions = ('author',)
 
     def get_queryset(self):
         title = get_object_or_404(
-            Title,
+            Title.objects.alive(),
             id=self.kwargs.get('title_id')
         )
-        return title.reviews.all()
+        return title.reviews.order_by(*self.keyset_ordering)
+
+    def get_conditional_version(self):
+        if self.action == 'retrieve':
+            version = Review.objects.filter(
+                pk=self.kwargs.get('pk'),
+                title_id=self.kwargs.get('title_id'),
+                title__is_deleted=False
+            ).values_list('version', 'modified').first()
+            key = 'review'
+        else:
+            version = Title.objects.alive().filter(
+                pk=self.kwargs.get('title_id')
+            ).values_list('version', 'modified').first()
+            key = 'title-reviews'
+        if version is None:
+            return None
+        return (key, *version)
 
     def perform_create(self, serializer):
         title = get_object_or_404(
-            Title,
+            Title.objects.alive(),
             id=self.kwargs.get('title_id')
         )
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(ModelViewSetWithoutPUT):
+class CommentViewSet(
+    AsyncViewMixin, ConditionalGetMixin, ModelViewSetWithoutPUT
+):
     """Вьюсет для комментариев."""
 
     serializer_class = CommentsSerializer
@@ -150,16 +224,33 @@ class CommentViewSet(ModelViewSetWithoutPUT):
         permissions.IsAuthenticatedOrReadOnly,
         AdminModeratorAuthorReadOnly
     ]
+    pagination_class = SwitchablePagination
+    keyset_ordering = ('-pub_date', 'id')
+    # Профиль автора меняется без новой версии отзыва.
+    unversioned_expansions = ('author',)
 
     def get_queryset(self):
         review = get_object_or_404(
             Review,
-            id=self.kwargs.get('review_id')
+            id=self.kwargs.get('review_id'),
+            title__is_deleted=False
         )
-        return review.comments.all()
+        return review.comments.order_by(*self.keyset_ordering)
+
+    def get_conditional_version(self):
+        version = Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+            title__is_deleted=False
+        ).values_list('version', 'modified').first()
+        if version is None:
+            return None
+        return (f'review-comments-{self.action}', *version)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
+        review = get_object_or_404(
+            Review, id=self.kwargs.get('review_id'), title__is_deleted=False
+        )
         serializer.save(author=self.request.user, review=review)
 
 
@@ -167,6 +258,7 @@ class CategoryViewSet(CategoryGenreModelMixin):
     """Вьюсет для категорий."""
 
     queryset = Category.objects.all()
+    list_cache_prefix = CATEGORY_CACHE_PREFIX
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (SearchFilter, )
@@ -178,6 +270,7 @@ class GenreViewSet(CategoryGenreModelMixin):
     """Вьюсет для жанров."""
 
     queryset = Genre.objects.all()
+    list_cache_prefix = GENRE_CACHE_PREFIX
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (SearchFilter,)
@@ -185,20 +278,154 @@ class GenreViewSet(CategoryGenreModelMixin):
     lookup_field = 'slug'
 
 
-class TitleViewSet(ModelViewSetWithoutPUT):
+class TitleViewSet(
+    AsyncViewMixin, ConditionalGetMixin, ModelViewSetWithoutPUT
+):
     """Вьюсет для произведения."""
 
-    queryset = Title.objects.select_related('category').annotate(
-        Avg('reviews__score')
-    ).order_by('name')
+    queryset = Title.objects.alive().defer('search_vector').order_by(
+        'name', 'id'
+    )
     serializer_class = TitleGetSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = [DjangoFilterBackend]
-    filterset_class = TitleFilter
-    search_fields = ['name']
-    ordering_fields = ['name', 'year']
+    pagination_class = SwitchablePagination
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    ordering_fields = ['name', 'year', 'rating', 'review_count']
+    ordering = ('name',)
+    read_actions = ModelViewSetWithoutPUT.read_actions + (
+        'score_distribution',
+    )
+
+    @property
+    def reads_summary(self):
+        """Список и карточка читаются из сводки произведений."""
+        return (
+            settings.TITLE_SUMMARY_READS
+            and self.action in ('retrieve', 'list')
+        )
+
+    @property
+    def keyset_ordering(self):
+        params = self.request.query_params
+        if (
+            params.get(SEARCH_PARAM)
+            and not params.get(StableOrderingFilter.ordering_param)
+        ):
+            # Порядок по рангу поиска не выражается ключом сортировки.
+            raise ValidationError({SEARCH_PARAM: [
+                'Результаты поиска по рангу выдаются только постранично '
+                'через limit/offset или с явным ?ordering=.'
+            ]})
+        return StableOrderingFilter().get_ordering(
+            self.request, self.get_queryset(), self
+        )
+
+    @property
+    def filterset_class(self):
+        if self.reads_summary:
+            return TitleSummaryFilter
+        return TitleFilter
+
+    def get_queryset(self):
+        if self.reads_summary:
+            return TitleSummary.objects.order_by('name', 'pk')
+        if self.action in self.read_actions:
+            # Связи для чтения подключает планировщик по полям ответа.
+            return super().get_queryset()
+        return super().get_queryset().select_related('category')
 
     def get_serializer_class(self):
+        if self.reads_summary:
+            return TitleSummarySerializer
         if self.action in ('retrieve', 'list'):
             return TitleGetSerializer
+        if self.action == 'score_distribution':
+            return TitleScoreDistributionSerializer
         return TitleCreateSerializer
+
+    @action(methods=['POST', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'detail': 'Ожидается непустой список произведений.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.TITLE_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    'detail': (
+                        'Не больше '
+                        f'{settings.TITLE_BULK_MAX_ITEMS} произведений.'
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        results = bulk_save_titles(
+            items, partial=request.method == 'PATCH'
+        )
+        return Response(results, status=status.HTTP_200_OK)
+
+    def perform_destroy(self, instance):
+        # Отзывы, комментарии и само произведение удаляет purge_deleted.
+        Title.objects.filter(pk=instance.pk).mark_deleted()
+
+    @action(methods=['GET'], detail=True, url_path='score-distribution')
+    def score_distribution(self, request, pk=None):
+        """Число отзывов по оценкам из счётчиков произведения."""
+        return self.retrieve(request, pk=pk)
+
+    def get_conditional_version(self):
+        if self.action not in ('retrieve', 'score_distribution'):
+            return None
+        version = Title.objects.alive().filter(
+            pk=self.kwargs.get('pk')
+        ).values_list('version', 'modified').first()
+        if version is None:
+            return None
+        return ('title', *version)
+
+
+class MetricsView(APIView):
+    """
+    Перцентили времени и числа запросов к БД по эндпоинтам
+    текущего процесса. DELETE сбрасывает накопленные данные.
+    """
+
+    permission_classes = (AdminOnly,)
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.REQUEST_METRICS,
+            'endpoints': endpoint_stats.snapshot(),
+        })
+
+    def delete(self, request):
+        endpoint_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class DatabaseStatsView(APIView):
+    """
+    Соединения с БД текущего процесса: настройки постоянных
+    соединений, результаты проверок перед повторным использованием
+    и счётчики пулов (открыто, свободно, ожидания, переподключения).
+    """
+
+    permission_classes = (AdminOnly,)
+
+    def get(self, request):
+        return Response({
+            'databases': {
+                alias: {
+                    'engine': connections.settings[alias]['ENGINE'],
+                    'conn_max_age': connections.settings[alias][
+                        'CONN_MAX_AGE'
+                    ],
+                }
+                for alias in connections
+            },
+            'health_checks': settings.CONN_HEALTH_CHECKS,
+            'health': health_stats(),
+            'pools': pool_stats(),
+        })
@@ -0,0 +1,74 @@
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.json', '.yaml', '.svg', '.html', '.txt',
+    '.xml', '.ttf', '.eot', '.otf', '.ico',
+)
+MIN_COMPRESS_SIZE = 256
+MAX_COMPRESSED_RATIO = 0.9
+
+
+def gzip_compress(content):
+    """gzip без времени изменения: одинаковые файлы сжимаются одинаково."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        fileobj=buffer, mode='wb', compresslevel=9, mtime=0
+    ) as file:
+        file.write(content)
+    return buffer.getvalue()
+
+
+def brotli_compress(content):
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика с хешем содержимого в именах файлов и заранее сжатыми
+    копиями .gz и .br (если установлен brotli), которые nginx отдаёт
+    как есть, не сжимая файлы на каждый запрос.
+    """
+
+    # Файл, которого нет в манифесте, хешируется на лету, а не
+    # вызывает ошибку; отсутствующий файл по-прежнему даёт ValueError.
+    manifest_strict = False
+
+    def get_compressors(self):
+        compressors = [('.gz', gzip_compress)]
+        if brotli is not None:
+            compressors.append(('.br', brotli_compress))
+        return compressors
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        compressors = self.get_compressors()
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                yield from self.compress(name, compressors)
+
+    def compress(self, name, compressors):
+        with self.open(name) as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compress in compressors:
+            compressed = compress(content)
+            if len(compressed) > len(content) * MAX_COMPRESSED_RATIO:
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield name, compressed_name, True
@@ -0,0 +1,19 @@
+"""
+Настройки gunicorn для ASGI-режима:
+
+    gunicorn api_yamdb.asgi:application -c gunicorn_asgi.py
+
+Воркеры uvicorn обслуживают медленных клиентов в цикле событий,
+а запросы к БД выполняются в пуле из ASYNC_VIEW_THREADS потоков.
+"""
+import multiprocessing
+import os
+
+bind = '0:8000'
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(
+    os.getenv('WEB_CONCURRENCY', default=multiprocessing.cpu_count() + 1)
+)
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
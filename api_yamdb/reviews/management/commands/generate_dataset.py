@@ -0,0 +1,341 @@
+import csv
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.models import (Category, Comments, Genre, Review, Title,
+                            TitleGenre, TitleSummary)
+from users.models import User
+
+NULL = r'\N'
+SCORES = range(1, 11)
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 14, 11, 7)
+DATE_POOL_SIZE = 4096
+DATE_SPAN_DAYS = 3 * 365
+WEIGHTED_ROUNDS = 3
+SQLITE_LOAD_PRAGMAS = (
+    ('synchronous', 'OFF'),
+    ('journal_mode', 'MEMORY'),
+    ('cache_size', -262144),
+)
+
+
+def zipf_cum_weights(size, skew):
+    """Накопленные веса рангов 1..size по закону Ципфа."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+def distribute(total, size, skew, cap, rng):
+    """
+    Раскладывает total строк по size владельцам с перекосом Ципфа,
+    не больше cap на владельца; популярные владельцы перемешаны.
+    """
+    if total > size * cap:
+        raise CommandError(
+            f'Нельзя разложить {total} строк по {size} владельцам: '
+            f'не больше {cap} на каждого.'
+        )
+    weights = [1 / rank ** skew for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    remainder = total - sum(counts)
+    while remainder:
+        for index, count in enumerate(counts):
+            if count < cap:
+                counts[index] += 1
+                remainder -= 1
+                if not remainder:
+                    break
+    rng.shuffle(counts)
+    return counts
+
+
+def pick_authors(rng, count, cum_weights):
+    """
+    Выбирает count разных авторов, чаще «активных» пользователей.
+    Недобор после нескольких взвешенных раундов добирается равномерно.
+    """
+    population = len(cum_weights)
+    chosen = set()
+    for _ in range(WEIGHTED_ROUNDS):
+        chosen.update(rng.choices(
+            range(population), cum_weights=cum_weights,
+            k=count - len(chosen)
+        ))
+        if len(chosen) >= count:
+            return chosen
+    if count * 2 > population:
+        rest = [index for index in range(population) if index not in chosen]
+        chosen.update(rng.sample(rest, count - len(chosen)))
+        return chosen
+    while len(chosen) < count:
+        chosen.add(rng.randrange(population))
+    return chosen
+
+
+class Command(BaseCommand):
+    """Генерация синтетических данных для нагрузочного тестирования."""
+
+    help = (
+        'Создаёт пользователей, произведения, отзывы и комментарии '
+        'с перекосом популярности, соблюдая уникальность отзыва '
+        'и комментария автора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument(
+            '--title-skew', type=float, default=1.0,
+            help='Показатель Ципфа для числа отзывов на произведение.'
+        )
+        parser.add_argument(
+            '--review-skew', type=float, default=1.0,
+            help='Показатель Ципфа для числа комментариев на отзыв.'
+        )
+        parser.add_argument(
+            '--user-skew', type=float, default=1.0,
+            help='Показатель Ципфа для активности авторов.'
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.use_copy = connection.vendor == 'postgresql'
+        self.now = timezone.now()
+        self.dates = [
+            connection.ops.adapt_datetimefield_value(
+                self.now - timedelta(
+                    seconds=self.rng.randrange(DATE_SPAN_DAYS * 86400)
+                )
+            )
+            for _ in range(DATE_POOL_SIZE)
+        ]
+        started = time.monotonic()
+        with self.fast_load():
+            total = self.generate(options)
+        self.finish()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
+
+    def generate(self, options):
+        users = self.start_id(User)
+        categories = self.start_id(Category)
+        genres = self.start_id(Genre)
+        titles = self.start_id(Title)
+        reviews = self.start_id(Review)
+        user_count = options['users']
+        user_weights = zipf_cum_weights(user_count, options['user_skew'])
+        review_counts = distribute(
+            options['reviews'], options['titles'], options['title_skew'],
+            user_count, self.rng
+        )
+        comment_counts = distribute(
+            options['comments'], options['reviews'], options['review_skew'],
+            user_count, self.rng
+        )
+        total = self.write(User, ('username', 'email', 'password'), (
+            (users + index, f'gen{users + index}',
+             f'gen{users + index}@example.com', '!')
+            for index in range(user_count)
+        ))
+        total += self.write(Category, ('name', 'slug'), (
+            (categories + index, f'Категория {categories + index}',
+             f'gen-category-{categories + index}')
+            for index in range(options['categories'])
+        ))
+        total += self.write(Genre, ('name', 'slug'), (
+            (genres + index, f'Жанр {genres + index}',
+             f'gen-genre-{genres + index}')
+            for index in range(options['genres'])
+        ))
+        total += self.write(
+            Title, ('name', 'year', 'description', 'category'),
+            self.title_rows(titles, options['titles'], categories,
+                            options['categories'])
+        )
+        total += self.write(
+            TitleGenre, ('title', 'genre'),
+            self.title_genre_rows(titles, options['titles'], genres,
+                                  options['genres'])
+        )
+        total += self.write(
+            Review, ('title', 'author', 'text', 'score', 'pub_date'),
+            self.review_rows(reviews, titles, review_counts, users,
+                             user_weights)
+        )
+        total += self.write(
+            Comments, ('review', 'author', 'text', 'pub_date'),
+            self.comment_rows(reviews, comment_counts, users, user_weights)
+        )
+        return total
+
+    @contextmanager
+    def fast_load(self):
+        """
+        В SQLite на время загрузки отключает синхронную запись на диск
+        и держит журнал в памяти: при сбое данные генерируются заново.
+        """
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        with connection.cursor() as cursor:
+            saved = {}
+            for pragma, value in SQLITE_LOAD_PRAGMAS:
+                cursor.execute(f'PRAGMA {pragma}')
+                saved[pragma] = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                for pragma, value in saved.items():
+                    cursor.execute(f'PRAGMA {pragma} = {value}')
+
+    def start_id(self, model):
+        return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+    def title_rows(self, start, count, categories, category_count):
+        randint = self.rng.randint
+        for index in range(count):
+            pk = start + index
+            yield (
+                pk, f'Произведение {pk}', randint(1950, 2022),
+                f'Описание произведения {pk}',
+                categories + randint(0, category_count - 1)
+            )
+
+    def title_genre_rows(self, titles, count, genres, genre_count):
+        pk = self.start_id(TitleGenre)
+        for title in range(titles, titles + count):
+            for genre in self.rng.sample(
+                range(genre_count), self.rng.randint(1, 3)
+            ):
+                yield pk, title, genres + genre
+                pk += 1
+
+    def review_rows(self, start, titles, counts, users, user_weights):
+        rng, dates = self.rng, self.dates
+        score_weights = list(accumulate(SCORE_WEIGHTS))
+        pk = start
+        for index, count in enumerate(counts):
+            title = titles + index
+            authors = pick_authors(rng, count, user_weights)
+            scores = rng.choices(SCORES, cum_weights=score_weights, k=count)
+            for author, score in zip(authors, scores):
+                yield (
+                    pk, title, users + author, f'Отзыв {pk}', score,
+                    dates[pk % DATE_POOL_SIZE]
+                )
+                pk += 1
+
+    def comment_rows(self, reviews, counts, users, user_weights):
+        rng, dates = self.rng, self.dates
+        pk = self.start_id(Comments)
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            review = reviews + index
+            for author in pick_authors(rng, count, user_weights):
+                yield (
+                    pk, review, users + author, f'Комментарий {pk}',
+                    dates[pk % DATE_POOL_SIZE]
+                )
+                pk += 1
+
+    def get_columns(self, model, names):
+        """
+        Колонки таблицы: первичный ключ, генерируемые поля и значения
+        по умолчанию остальных полей, подготовленные один раз.
+        """
+        opts = model._meta
+        fields = [opts.pk] + [opts.get_field(name) for name in names]
+        defaults = [
+            field for field in opts.concrete_fields if field not in fields
+        ]
+        static = tuple(
+            field.get_db_prep_save(field.get_default(), connection)
+            for field in defaults
+        )
+        columns = ', '.join(
+            connection.ops.quote_name(field.column)
+            for field in fields + defaults
+        )
+        return columns, static
+
+    def write(self, model, names, rows):
+        columns, static = self.get_columns(model, names)
+        table = connection.ops.quote_name(model._meta.db_table)
+        started = time.monotonic()
+        written = 0
+        rows = iter(rows)
+        while True:
+            batch = [row + static for row in islice(rows, self.batch_size)]
+            if not batch:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                if self.use_copy:
+                    self.copy(cursor, table, columns, batch)
+                else:
+                    placeholders = ', '.join(['%s'] * len(batch[0]))
+                    cursor.executemany(
+                        f'INSERT INTO {table} ({columns}) '
+                        f'VALUES ({placeholders})',
+                        batch
+                    )
+            written += len(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model._meta.db_table}: {written} строк за {elapsed:.1f} с '
+            f'({written / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+        return written
+
+    def copy(self, cursor, table, columns, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([
+                NULL if value is None
+                else ('t' if value else 'f') if isinstance(value, bool)
+                else value
+                for value in row
+            ])
+        buffer.seek(0)
+        cursor.copy_expert(
+            f'COPY {table} ({columns}) '
+            f"FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+            buffer
+        )
+
+    def finish(self):
+        """Сдвигает последовательности и пересчитывает производные данные."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(),
+            [User, Category, Genre, Title, TitleGenre, Review, Comments]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        with transaction.atomic():
+            Title.objects.refresh_ratings()
+        TitleSummary.objects.rebuild(chunk_size=self.batch_size)
+        cache.clear()
@@ -0,0 +1,281 @@
+import csv
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from reviews.models import (Category, Comments, Genre, Review, Title,
+                            TitleGenre, TitleSummary)
+from users.models import User
+
+TABLES = (
+    ('users', User),
+    ('category', Category),
+    ('genre', Genre),
+    ('titles', Title),
+    ('genre_title', TitleGenre),
+    ('review', Review),
+    ('comments', Comments),
+)
+EXTENSIONS = ('.csv', '.ndjson', '.jsonl')
+STATE_FILE = '.import_state.json'
+UNUSABLE_PASSWORD = '!'
+NULL = r'\N'
+
+
+def read_rows(path):
+    """Построчно читает CSV или NDJSON как словари."""
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+@contextmanager
+def keep_auto_now_values(fields):
+    """
+    Отключает auto_now_add у загружаемых полей,
+    чтобы сохранить даты публикации из файла.
+    """
+    fields = [
+        field for field in fields if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    """Пакетная загрузка данных из CSV/NDJSON."""
+
+    help = (
+        'Загружает пользователей, категории, жанры, произведения, '
+        'отзывы и комментарии из CSV/NDJSON с продолжением после сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с файлами users.csv, category.csv и т.д.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загружать через COPY (только PostgreSQL).'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать заново, не учитывая сохранённый прогресс.'
+        )
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.use_copy = options['copy']
+        if self.use_copy and connection.vendor != 'postgresql':
+            raise CommandError('--copy поддерживается только в PostgreSQL.')
+        self.state_path = os.path.join(self.path, STATE_FILE)
+        self.state = {} if options['restart'] else self.load_state()
+        started = time.monotonic()
+        total = self.skipped = 0
+        for name, model in TABLES:
+            total += self.import_table(name, model)
+        self.reset_sequences()
+        with transaction.atomic():
+            Title.objects.refresh_ratings()
+        TitleSummary.objects.rebuild(chunk_size=self.batch_size)
+        cache.clear()
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с)'
+            + (f', пропущено: {self.skipped}' if self.skipped else '')
+        ))
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as file:
+            return json.load(file)
+
+    def save_state(self):
+        with open(self.state_path, 'w') as file:
+            json.dump(self.state, file)
+
+    def find_file(self, name):
+        for extension in EXTENSIONS:
+            path = os.path.join(self.path, name + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def import_table(self, name, model):
+        path = self.find_file(name)
+        if path is None:
+            self.stdout.write(f'{name}: файл не найден, пропущено')
+            return 0
+        done = self.state.get(name, 0)
+        started = time.monotonic()
+        loaded = skipped = 0
+        batch = []
+        for number, row in enumerate(read_rows(path), start=1):
+            if number <= done:
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                added, rejected = self.write_batch(name, model, batch, number)
+                loaded += added
+                skipped += rejected
+                batch = []
+        if batch:
+            added, rejected = self.write_batch(name, model, batch, number)
+            loaded += added
+            skipped += rejected
+        self.skipped += skipped
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{name}: {loaded} строк за {elapsed:.1f} с '
+            f'({loaded / max(elapsed, 1e-9):.0f} строк/с)'
+            + (f', продолжено с {done}' if done else '')
+            + (f', пропущено уже загруженных или конфликтующих: {skipped}'
+               if skipped else '')
+        )
+        return loaded
+
+    def write_batch(self, name, model, rows, position):
+        """
+        Записывает пачку и сохраняет прогресс. Возвращает число
+        вставленных и число пропущенных из-за конфликтов строк.
+        """
+        columns = self.get_columns(model, rows[0])
+        fields = [field for _, field in columns]
+        with transaction.atomic(), keep_auto_now_values(fields):
+            inserted = self.insert_rows(model, columns, rows)
+        self.state[name] = position
+        self.save_state()
+        return inserted, len(rows) - inserted
+
+    def insert_rows(self, model, columns, rows):
+        """Вставляет строки и возвращает число действительно вставленных."""
+        if self.use_copy:
+            # COPY не пропускает конфликты: пачка вставляется целиком.
+            self.copy_rows(model, columns, rows)
+            return len(rows)
+        existing = self.count_existing(model, columns, rows)
+        model.objects.bulk_create(
+            [self.build_object(model, columns, row) for row in rows],
+            batch_size=self.batch_size,
+            ignore_conflicts=True
+        )
+        return self.count_existing(model, columns, rows) - existing
+
+    def count_existing(self, model, columns, rows):
+        """
+        Число строк пачки, уже лежащих в таблице: по первичному ключу
+        из файла, а без него — число строк всей таблицы.
+        """
+        for header, field in columns:
+            if field.primary_key:
+                return model.objects.filter(pk__in=[
+                    self.convert(field, row[header]) for row in rows
+                ]).count()
+        return model.objects.count()
+
+    def get_columns(self, model, row):
+        """Сопоставляет заголовки файла с полями модели."""
+        columns = []
+        for header in row:
+            try:
+                field = model._meta.get_field(header)
+            except FieldDoesNotExist:
+                raise CommandError(
+                    f'{model.__name__}: неизвестная колонка {header}'
+                )
+            columns.append((header, field))
+        return columns
+
+    def convert(self, field, value):
+        if value in ('', None) and field.null:
+            return None
+        if field.is_relation:
+            field = field.target_field
+        return field.to_python(value)
+
+    def build_object(self, model, columns, row):
+        obj = model(**{
+            field.attname: self.convert(field, row[header])
+            for header, field in columns
+        })
+        if model is User and not obj.password:
+            obj.password = UNUSABLE_PASSWORD
+        return obj
+
+    def copy_rows(self, model, columns, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        fields = [field for _, field in columns]
+        # Поля с default и auto_now_add, которых нет в файле,
+        # заполняются так же, как при bulk_create.
+        extra = [
+            field for field in model._meta.concrete_fields
+            if field not in fields and not field.primary_key
+            and (field.has_default() or getattr(field, 'auto_now_add', False))
+        ]
+        password = model._meta.get_field('password') if model is User else None
+        if password is not None and password not in fields + extra:
+            extra.append(password)
+        for row in rows:
+            obj = self.build_object(model, columns, row)
+            writer.writerow([
+                self.copy_value(field.get_db_prep_save(
+                    field.pre_save(obj, add=True), connection
+                ))
+                for field in fields + extra
+            ])
+        buffer.seek(0)
+        names = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields + extra
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f"({names}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+                buffer
+            )
+
+    @staticmethod
+    def copy_value(value):
+        if value is None:
+            return NULL
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        return value
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [model for _, model in TABLES]
+        )
+        if not statements:
+            return
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    """Обработчик произведений и пользователей с отметкой об удалении."""
+
+    help = (
+        'Пачками удаляет отзывы и комментарии удалённых произведений '
+        'и пользователей, затем их самих.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.PURGE_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя новые удаления.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между проверками, секунды.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            parents, rows = purge_deleted(options['batch_size'])
+            if parents:
+                self.stdout.write(
+                    f'Удалено произведений и пользователей: {parents}, '
+                    f'отзывов и комментариев: {rows}'
+                )
+            if not options['loop']:
+                return
+            if not parents:
+                time.sleep(options['interval'])
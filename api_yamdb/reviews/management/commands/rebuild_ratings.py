@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import Title, TitleSummary
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает сохранённые рейтинги и счётчики оценок
+    произведений по отзывам, если они разошлись с таблицей отзывов.
+    """
+
+    help = (
+        'Пересчитывает сумму оценок, число отзывов, рейтинг '
+        'и распределение оценок произведений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--title',
+            type=int,
+            action='append',
+            dest='titles',
+            help='id произведения; по умолчанию пересчитываются все.'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Title.objects.all()
+        if options['titles']:
+            queryset = queryset.filter(pk__in=options['titles'])
+        with transaction.atomic():
+            updated = queryset.refresh_ratings()
+            TitleSummary.objects.filter(title__in=queryset).sync_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитан рейтинг произведений: {updated}')
+        )
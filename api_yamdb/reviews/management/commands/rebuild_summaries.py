@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from reviews.models import Title, TitleSummary
+
+
+class Command(BaseCommand):
+    """Пересобирает денормализованную сводку произведений."""
+
+    help = 'Пересобирает сводку произведений для чтения каталога.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--title',
+            type=int,
+            action='append',
+            dest='titles',
+            help='id произведения; по умолчанию пересобираются все.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество произведений в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Title.objects.all()
+        if options['titles']:
+            queryset = queryset.filter(pk__in=options['titles'])
+        rebuilt = TitleSummary.objects.rebuild(
+            queryset, chunk_size=options['batch_size']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересобрана сводка произведений: {rebuilt}')
+        )
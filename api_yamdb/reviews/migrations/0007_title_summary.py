@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-18 17:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_title_summaries(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleSummary = apps.get_model('reviews', 'TitleSummary')
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('pk')
+    TitleSummary.objects.bulk_create(
+        (
+            TitleSummary(
+                title_id=title.pk,
+                name=title.name,
+                year=title.year,
+                description=title.description,
+                category_name=title.category.name if title.category else '',
+                category_slug=title.category.slug if title.category else '',
+                genres=[
+                    {'name': genre.name, 'slug': genre.slug}
+                    for genre in title.genre.all()
+                ],
+                rating=title.rating,
+                review_count=title.review_count,
+            )
+            for title in titles
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSummary',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('name', models.CharField(max_length=256, verbose_name='Название произведения')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год выпуска произведения')),
+                ('description', models.TextField(blank=True, verbose_name='Описание произведения')),
+                ('category_name', models.CharField(blank=True, max_length=256, verbose_name='Название категории')),
+                ('category_slug', models.SlugField(blank=True, db_index=False, verbose_name='URL категории')),
+                ('genres', models.JSONField(blank=True, default=list, verbose_name='Жанры')),
+                ('rating', models.FloatField(null=True, verbose_name='Рейтинг')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+            ],
+            options={
+                'verbose_name': 'Сводка произведения',
+                'verbose_name_plural': 'Сводки произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titlesummary',
+            index=models.Index(fields=['name', 'title'], name='titlesummary_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlesummary',
+            index=models.Index(fields=['category_slug', 'name', 'title'], name='titlesummary_category_idx'),
+        ),
+        migrations.RunPython(fill_title_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 17:31
+
+from django.db import migrations, models
+
+# NULL-рейтинг при сортировке считается наименьшим. В PostgreSQL это
+# требует NULLS FIRST в индексе, SQLite так сортирует по умолчанию
+# и не допускает NULLS FIRST в CREATE INDEX.
+RATING_INDEXES = (
+    ('titlesummary_rating_idx', ''),
+    ('titlesummary_cat_rating_idx', 'category_slug, '),
+)
+
+
+def create_rating_indexes(apps, schema_editor):
+    nulls = (
+        ' NULLS FIRST'
+        if schema_editor.connection.vendor == 'postgresql' else ''
+    )
+    for name, prefix in RATING_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {name} ON reviews_titlesummary '
+            f'({prefix}rating ASC{nulls}, title_id)'
+        )
+
+
+def drop_rating_indexes(apps, schema_editor):
+    for name, _ in RATING_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='titlesummary',
+            index=models.Index(fields=['review_count', 'title'], name='titlesummary_reviews_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlesummary',
+            index=models.Index(fields=['category_slug', 'review_count', 'title'], name='titlesummary_cat_reviews_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlesummary',
+            index=models.Index(fields=['year', 'title'], name='titlesummary_year_idx'),
+        ),
+        migrations.RunPython(create_rating_indexes, drop_rating_indexes),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+# Как и в 0008_summary_ordering_indexes: NULL-рейтинг считается
+# наименьшим, что в PostgreSQL требует NULLS FIRST в индексе, а SQLite
+# так сортирует по умолчанию и не допускает NULLS FIRST в CREATE INDEX.
+# По убыванию индекс читается в обратном порядке (DESC NULLS LAST).
+RATING_INDEXES = (
+    ('title_rating_idx', ''),
+    ('title_cat_rating_idx', 'category_id, '),
+)
+
+
+def create_rating_indexes(apps, schema_editor):
+    nulls = (
+        ' NULLS FIRST'
+        if schema_editor.connection.vendor == 'postgresql' else ''
+    )
+    for name, prefix in RATING_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {name} ON reviews_title '
+            f'({prefix}rating ASC{nulls}, id)'
+        )
+
+
+def drop_rating_indexes(apps, schema_editor):
+    for name, _ in RATING_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['review_count', 'id'], name='title_reviews_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'review_count', 'id'], name='title_cat_reviews_idx'),
+        ),
+        migrations.RunPython(create_rating_indexes, drop_rating_indexes),
+    ]
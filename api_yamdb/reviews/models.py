@@ -1,8 +1,15 @@
+import re
+
 from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
+from django.db import connections, models, transaction
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F,
+                              FloatField, IntegerField, OuterRef, Q, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.utils import timezone
 from users.models import User
 
@@ -51,7 +58,239 @@ class Genre(models.Model):
         return f'Жанр: {self.name}'
 
 
-class Title(models.Model):
+SEARCH_CONFIG = 'simple'
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    """Имя счётчика отзывов с оценкой score."""
+    return f'score_{score}'
+
+
+SCORE_FIELDS = tuple(score_field(score) for score in SCORES)
+
+
+class VersionedQuerySet(models.QuerySet):
+    """Набор запросов для моделей со счётчиком версий."""
+
+    def touch(self, **changes):
+        """Атомарно увеличивает версию и время изменения."""
+        return self.update(
+            version=F('version') + 1,
+            modified=timezone.now(),
+            **changes
+        )
+
+
+class VersionedModel(models.Model):
+    """
+    Модель с версией и временем изменения,
+    по которым API отвечает на условные запросы.
+    """
+
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Версия'
+    )
+    modified = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Дата изменения'
+    )
+
+    stored_fields = ('version', 'modified')
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """
+        При обновлении не перезаписывает поля, которые ведёт база данных,
+        и атомарно увеличивает версию.
+        """
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.stored_fields
+            ]
+        super().save(*args, **kwargs)
+        if not adding:
+            type(self)._default_manager.filter(pk=self.pk).touch()
+
+
+class TitleQuerySet(VersionedQuerySet):
+    """Набор запросов для произведений."""
+
+    def search(self, text):
+        """
+        Полнотекстовый поиск по названию и описанию
+        с ранжированием и поиском по началу слова.
+        """
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return self
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(
+                ' & '.join(f'{term}:*' for term in terms),
+                config=SEARCH_CONFIG,
+                search_type='raw'
+            )
+            return self.filter(search_vector=query).annotate(
+                search_rank=SearchRank(F('search_vector'), query)
+            ).order_by('-search_rank', 'name', 'id')
+        condition = Q()
+        rank = Value(0)
+        for term in terms:
+            in_name = Q(name__icontains=term)
+            in_description = Q(description__icontains=term)
+            condition &= in_name | in_description
+            rank += Case(
+                When(in_name, then=Value(2)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        return self.filter(condition).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', 'name', 'id')
+
+    def alive(self):
+        """Произведения без отметки об удалении."""
+        return self.filter(is_deleted=False)
+
+    def mark_deleted(self):
+        """
+        Сразу скрывает произведения из API и сводки. Отзывы,
+        комментарии и сами произведения удаляет purge_deleted.
+        """
+        TitleSummary.objects.filter(title__in=self).delete()
+        return self.touch(is_deleted=True)
+
+    def apply_score_change(self, added=None, removed=None):
+        """
+        Атомарно учитывает добавленную и исключает удалённую оценку
+        в сумме оценок, числе отзывов, рейтинге и счётчиках оценок.
+        """
+        score_delta = (added or 0) - (removed or 0)
+        count_delta = (added is not None) - (removed is not None)
+        counters = {}
+        for score, delta in ((added, 1), (removed, -1)):
+            if score is not None:
+                name = score_field(score)
+                counters[name] = counters.get(name, F(name)) + delta
+        return self.touch(
+            rating_sum=F('rating_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+            rating=ExpressionWrapper(
+                Cast(F('rating_sum') + score_delta, FloatField())
+                / NullIf(F('review_count') + count_delta, 0),
+                output_field=FloatField()
+            ),
+            **counters
+        )
+
+    def refresh_ratings(self):
+        """Пересчитывает сохранённый рейтинг по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        counters = {
+            score_field(score): Coalesce(
+                Subquery(
+                    reviews.filter(score=score).annotate(
+                        value=Count('pk')
+                    ).values('value')
+                ),
+                0
+            )
+            for score in SCORES
+        }
+        return self.touch(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('pk')).values('value')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(value=Avg('score')).values('value')
+            ),
+            **counters
+        )
+
+
+class ScoreCountsModel(models.Model):
+    """Число отзывов с каждой оценкой от 1 до 10."""
+
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 1'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 2'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 3'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 4'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 5'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 6'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 7'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 8'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 9'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 10'
+    )
+
+    class Meta:
+        abstract = True
+
+    @property
+    def score_distribution(self):
+        """Число отзывов по оценкам: {1: ..., 10: ...}."""
+        return {score: getattr(self, score_field(score)) for score in SCORES}
+
+
+class Title(VersionedModel, ScoreCountsModel):
     """Модель произведения."""
 
     name = models.CharField(
@@ -85,18 +324,72 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='Категория произведения'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Удалено'
+    )
+
+    stored_fields = VersionedModel.stored_fields + (
+        'rating_sum', 'review_count', 'rating', 'search_vector',
+        'is_deleted', *SCORE_FIELDS
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(
+                fields=['category', 'name', 'id'],
+                name='title_category_name_idx'
+            ),
+            models.Index(
+                fields=['year', 'name', 'id'],
+                name='title_year_name_idx'
+            ),
+            # Индексы по рейтингу с NULLS FIRST создаёт миграция
+            # 0012_title_ordering_indexes.
+            models.Index(
+                fields=['review_count', 'id'],
+                name='title_reviews_idx'
+            ),
+            models.Index(
+                fields=['category', 'review_count', 'id'],
+                name='title_cat_reviews_idx'
+            ),
+            models.Index(
+                fields=['id'],
+                condition=Q(is_deleted=True),
+                name='title_deleted_idx'
+            ),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
     def __str__(self):
         return f'Произведение: {self.name}'
 
-    @property
-    def rating(self):
-        return self.reviews.aggregate(Avg('score'))['score__avg']
-
     def clean(self):
         if timezone.now().year < self.year < 1900:
             raise ValidationError('Год выпуска не может быть меньше 1900')
@@ -117,6 +410,16 @@ class TitleGenre(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['title', 'genre'],
+                name='titlegenre_title_genre_idx'
+            ),
+            models.Index(
+                fields=['genre', 'title'],
+                name='titlegenre_genre_title_idx'
+            ),
+        ]
         verbose_name = 'Произведение и жанр'
         verbose_name_plural = 'Произведения и жанр'
 
@@ -124,7 +427,7 @@ class TitleGenre(models.Model):
         return f'{self.title} {self.genre}'
 
 
-class Review(models.Model):
+class Review(VersionedModel):
     """Модель отзыва."""
 
     title = models.ForeignKey(
@@ -162,12 +465,30 @@ class Review(models.Model):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
     def __str__(self):
         return self.text[:settings.STR_LENGTH]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв в одной транзакции с рейтингом произведения."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_values = {'title_id': self.title_id, 'score': self.score}
+
 
 class Comments(models.Model):
     """Модель комментариев."""
@@ -200,8 +521,197 @@ class Comments(models.Model):
                 name='unique_comment'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text[:settings.STR_LENGTH]
+
+
+class TitleSummaryQuerySet(models.QuerySet):
+    """Запросы к денормализованной сводке произведений."""
+
+    def rebuild(self, titles=None, chunk_size=1000):
+        """
+        Пересобирает сводку для переданных произведений (по умолчанию
+        для всех) пачками по chunk_size строк. Произведения с отметкой
+        об удалении из сводки убираются.
+        """
+        titles = Title.objects.all() if titles is None else titles
+        title_ids = list(
+            titles.order_by('pk').values_list('pk', flat=True)
+        )
+        for start in range(0, len(title_ids), chunk_size):
+            chunk = title_ids[start:start + chunk_size]
+            summaries = [
+                self.model.from_title(title)
+                for title in Title.objects.alive().filter(
+                    pk__in=chunk
+                ).select_related('category').prefetch_related('genre')
+            ]
+            with transaction.atomic(using=self.db):
+                self.filter(title_id__in=chunk).exclude(
+                    title_id__in=[summary.title_id for summary in summaries]
+                ).delete()
+                self.upsert(summaries)
+        return len(title_ids)
+
+    def upsert(self, summaries):
+        """
+        Вставляет строки сводки, а существующие обновляет одним
+        INSERT ... ON CONFLICT (title_id) DO UPDATE: параллельные
+        пересборки одного произведения не ломают друг друга
+        нарушением первичного ключа.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        fields = self.model._meta.concrete_fields
+        columns = [quote(field.column) for field in fields]
+        updates = ', '.join(
+            f'{column} = EXCLUDED.{column}'
+            for field, column in zip(fields, columns)
+            if not field.primary_key
+        )
+        batch_size = max(
+            connection.ops.bulk_batch_size(fields, summaries), 1
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(summaries), batch_size):
+                batch = summaries[start:start + batch_size]
+                rows = ', '.join(
+                    [f'({", ".join(["%s"] * len(fields))})'] * len(batch)
+                )
+                cursor.execute(
+                    f'INSERT INTO {quote(self.model._meta.db_table)} '
+                    f'({", ".join(columns)}) VALUES {rows} '
+                    f'ON CONFLICT ({quote(self.model._meta.pk.column)}) '
+                    f'DO UPDATE SET {updates}',
+                    [
+                        field.get_db_prep_save(
+                            getattr(summary, field.attname), connection
+                        )
+                        for summary in batch for field in fields
+                    ]
+                )
+
+    def sync_ratings(self):
+        """
+        Копирует сохранённые рейтинг, число отзывов и счётчики оценок
+        из произведения.
+        """
+        titles = Title.objects.filter(pk=OuterRef('title_id'))
+        return self.update(**{
+            name: Subquery(titles.values(name))
+            for name in ('rating', 'review_count', *SCORE_FIELDS)
+        })
+
+
+class TitleSummary(ScoreCountsModel):
+    """
+    Сводка произведения для чтения каталога: категория, жанры и рейтинг
+    хранятся в одной строке, поэтому список отдаётся без JOIN.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='summary',
+        verbose_name='Произведение'
+    )
+    name = models.CharField(
+        max_length=256,
+        verbose_name='Название произведения'
+    )
+    year = models.PositiveSmallIntegerField(
+        verbose_name='Год выпуска произведения'
+    )
+    description = models.TextField(
+        blank=True,
+        verbose_name='Описание произведения'
+    )
+    category_name = models.CharField(
+        max_length=256,
+        blank=True,
+        verbose_name='Название категории'
+    )
+    category_slug = models.SlugField(
+        max_length=50,
+        blank=True,
+        db_index=False,
+        verbose_name='URL категории'
+    )
+    genres = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Жанры'
+    )
+    rating = models.FloatField(
+        null=True,
+        verbose_name='Рейтинг'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+
+    objects = TitleSummaryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['name', 'title'],
+                name='titlesummary_name_idx'
+            ),
+            models.Index(
+                fields=['category_slug', 'name', 'title'],
+                name='titlesummary_category_idx'
+            ),
+            models.Index(
+                fields=['review_count', 'title'],
+                name='titlesummary_reviews_idx'
+            ),
+            models.Index(
+                fields=['category_slug', 'review_count', 'title'],
+                name='titlesummary_cat_reviews_idx'
+            ),
+            models.Index(
+                fields=['year', 'title'],
+                name='titlesummary_year_idx'
+            ),
+            models.Index(
+                fields=['year', 'name', 'title'],
+                name='titlesummary_year_name_idx'
+            ),
+        ]
+        verbose_name = 'Сводка произведения'
+        verbose_name_plural = 'Сводки произведений'
+
+    def __str__(self):
+        return f'Сводка: {self.name}'
+
+    @classmethod
+    def from_title(cls, title):
+        """Строит сводку по произведению с категорией и жанрами."""
+        category = title.category
+        return cls(
+            title_id=title.pk,
+            name=title.name,
+            year=title.year,
+            description=title.description,
+            category_name=category.name if category else '',
+            category_slug=category.slug if category else '',
+            genres=[
+                {'name': genre.name, 'slug': genre.slug}
+                for genre in title.genre.all()
+            ],
+            rating=title.rating,
+            review_count=title.review_count,
+            **{name: getattr(title, name) for name in SCORE_FIELDS}
+        )
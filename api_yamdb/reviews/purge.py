@@ -0,0 +1,117 @@
+from django.db import transaction
+from users.models import User
+
+from .models import Comments, Review, Title, TitleSummary
+
+
+def _raw_delete(queryset):
+    """
+    Удаляет строки одним DELETE без сборщика каскадов и сигналов:
+    зависимые строки к этому моменту уже удалены.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def purge_comments(comments, batch_size):
+    """
+    Удаляет комментарии пачками по batch_size, каждую в своей
+    транзакции, и увеличивает версию их отзывов.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                comments.order_by('pk').values_list(
+                    'pk', 'review_id'
+                )[:batch_size]
+            )
+            if not batch:
+                return deleted
+            deleted += _raw_delete(
+                Comments.objects.filter(pk__in=[pk for pk, _ in batch])
+            )
+            Review.objects.filter(
+                pk__in={review_id for _, review_id in batch}
+            ).touch()
+
+
+def purge_reviews(reviews, batch_size):
+    """
+    Удаляет отзывы пачками по batch_size вместе с комментариями,
+    появившимися после purge_comments, и в той же транзакции
+    пересчитывает рейтинг и сводку затронутых произведений.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                reviews.order_by('pk').values_list(
+                    'pk', 'title_id'
+                )[:batch_size]
+            )
+            if not batch:
+                return deleted
+            review_ids = [pk for pk, _ in batch]
+            deleted += _raw_delete(
+                Comments.objects.filter(review_id__in=review_ids)
+            )
+            deleted += _raw_delete(Review.objects.filter(pk__in=review_ids))
+            titles = Title.objects.filter(
+                pk__in={title_id for _, title_id in batch}
+            )
+            titles.refresh_ratings()
+            TitleSummary.objects.filter(title__in=titles).sync_ratings()
+
+
+def purge_title(title_id, batch_size):
+    """
+    Удаляет произведение с отметкой об удалении: сначала пачками
+    его комментарии и отзывы, затем само произведение.
+    """
+    deleted = purge_comments(
+        Comments.objects.filter(review__title_id=title_id), batch_size
+    )
+    deleted += purge_reviews(
+        Review.objects.filter(title_id=title_id), batch_size
+    )
+    Title.objects.filter(pk=title_id, is_deleted=True).delete()
+    return deleted
+
+
+def purge_user(user_id, batch_size):
+    """
+    Удаляет пользователя с отметкой об удалении: сначала пачками его
+    комментарии, комментарии к его отзывам и сами отзывы, затем
+    пользователя. Рейтинг произведений пересчитывается по пачкам.
+    """
+    deleted = purge_comments(
+        Comments.objects.filter(author_id=user_id), batch_size
+    )
+    deleted += purge_comments(
+        Comments.objects.filter(review__author_id=user_id), batch_size
+    )
+    deleted += purge_reviews(
+        Review.objects.filter(author_id=user_id), batch_size
+    )
+    User.objects.filter(pk=user_id, is_deleted=True).delete()
+    return deleted
+
+
+def purge_deleted(batch_size=1000):
+    """
+    Удаляет все произведения и всех пользователей с отметкой
+    об удалении. Возвращает (число произведений и пользователей,
+    число удалённых отзывов и комментариев).
+    """
+    title_ids = list(
+        Title.objects.filter(is_deleted=True).values_list('pk', flat=True)
+    )
+    user_ids = list(
+        User.objects.filter(is_deleted=True).values_list('pk', flat=True)
+    )
+    rows = 0
+    for title_id in title_ids:
+        rows += purge_title(title_id, batch_size)
+    for user_id in user_ids:
+        rows += purge_user(user_id, batch_size)
+    return len(title_ids) + len(user_ids), rows
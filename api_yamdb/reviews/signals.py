@@ -0,0 +1,127 @@
+from threading import local
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .models import (Category, Comments, Genre, Review, Title, TitleGenre,
+                     TitleSummary)
+
+_pending = local()
+
+
+def _rebuild_pending_summaries():
+    title_ids, _pending.summaries = _pending.summaries, set()
+    TitleSummary.objects.rebuild(Title.objects.filter(pk__in=title_ids))
+
+
+def schedule_summary_rebuild(title_ids):
+    """
+    Пересобирает сводку произведений после фиксации транзакции.
+    Все id одной транзакции пересобираются вместе, один раз.
+    """
+    title_ids = set(title_ids)
+    if not title_ids:
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        TitleSummary.objects.rebuild(Title.objects.filter(pk__in=title_ids))
+        return
+    if not any(
+        func is _rebuild_pending_summaries
+        for _, func in connection.run_on_commit
+    ):
+        _pending.summaries = set()
+        transaction.on_commit(_rebuild_pending_summaries)
+    _pending.summaries.update(title_ids)
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating_on_save(sender, instance, created, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге произведения."""
+    titles = Title.objects.filter(pk=instance.title_id)
+    if created:
+        titles.apply_score_change(added=instance.score)
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    old_title_id = loaded.get('title_id')
+    old_score = loaded.get('score')
+    if not isinstance(old_score, int) or old_title_id is None:
+        titles.refresh_ratings()
+        return
+    if old_title_id != instance.title_id:
+        Title.objects.filter(pk=old_title_id).apply_score_change(
+            removed=old_score
+        )
+        titles.apply_score_change(added=instance.score)
+        return
+    titles.apply_score_change(added=instance.score, removed=old_score)
+
+
+@receiver(post_delete, sender=Review)
+def update_title_rating_on_delete(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга произведения."""
+    Title.objects.filter(pk=instance.title_id).apply_score_change(
+        removed=instance.score
+    )
+
+
+@receiver([post_save, post_delete], sender=Review)
+def sync_summary_rating(sender, instance, **kwargs):
+    title_ids = {instance.title_id}
+    title_ids.add(
+        getattr(instance, '_loaded_values', {}).get('title_id')
+    )
+    TitleSummary.objects.filter(title_id__in=title_ids).sync_ratings()
+
+
+@receiver([post_save, post_delete], sender=Comments)
+def touch_review_on_comment_change(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genre_change(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        Title.objects.filter(pk=instance.pk).touch()
+        schedule_summary_rebuild([instance.pk])
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).touch()
+        schedule_summary_rebuild(pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_titles_on_category_change(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+    Title.objects.filter(category=instance).touch()
+    deleted = kwargs['signal'] is pre_delete
+    TitleSummary.objects.filter(title__category=instance).update(
+        category_name='' if deleted else instance.name,
+        category_slug='' if deleted else instance.slug
+    )
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_titles_on_genre_change(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+    titles = Title.objects.filter(genre=instance)
+    titles.touch()
+    schedule_summary_rebuild(titles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Title)
+def rebuild_summary_on_title_save(sender, instance, **kwargs):
+    schedule_summary_rebuild([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=TitleGenre)
+def rebuild_summary_on_title_genre_change(sender, instance, **kwargs):
+    schedule_summary_rebuild([instance.title_id])
@@ -0,0 +1,199 @@
+from django.test import TestCase, TransactionTestCase
+from users.models import User
+
+from .models import SCORES, Category, Comments, Review, Title, TitleSummary
+from .purge import purge_deleted
+
+
+class TitleSummaryTests(TransactionTestCase):
+    """
+    Сводка произведений следует за произведениями и отзывами.
+    Сводка пересобирается после фиксации транзакции, поэтому тесты
+    работают без общей транзакции.
+    """
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Книги', slug='books')
+        self.title = Title.objects.create(
+            name='Первое', year=2000, category=self.category
+        )
+        self.other = Title.objects.create(name='Второе', year=2001)
+        self.author = User.objects.create(
+            username='author', email='author@example.com'
+        )
+
+    def assert_summary_matches(self, title):
+        title.refresh_from_db()
+        summary = TitleSummary.objects.get(title=title)
+        self.assertEqual(summary.name, title.name)
+        self.assertEqual(summary.rating, title.rating)
+        self.assertEqual(summary.review_count, title.review_count)
+        self.assertEqual(
+            summary.score_distribution, title.score_distribution
+        )
+
+    def test_summary_created_with_title(self):
+        summary = TitleSummary.objects.get(title=self.title)
+        self.assertEqual(summary.category_slug, 'books')
+        self.assertEqual(summary.review_count, 0)
+        self.assertIsNone(summary.rating)
+
+    def test_summary_follows_title_changes(self):
+        self.title.name = 'Переименовано'
+        self.title.save()
+        self.assert_summary_matches(self.title)
+
+    def test_summary_follows_reviews(self):
+        review = Review.objects.create(
+            title=self.title, author=self.author, text='Текст', score=8
+        )
+        self.assert_summary_matches(self.title)
+        self.assertEqual(self.title.rating, 8)
+
+        review.score = 4
+        review.save()
+        self.assert_summary_matches(self.title)
+        self.assertEqual(self.title.rating, 4)
+
+        review.title = self.other
+        review.save()
+        self.assert_summary_matches(self.title)
+        self.assert_summary_matches(self.other)
+        self.assertEqual(self.title.review_count, 0)
+        self.assertIsNone(self.title.rating)
+        self.assertEqual(self.other.review_count, 1)
+        self.assertEqual(self.other.rating, 4)
+
+        review.delete()
+        self.assert_summary_matches(self.other)
+        self.assertEqual(self.other.review_count, 0)
+        self.assertIsNone(self.other.rating)
+
+    def test_rebuild_restores_summary(self):
+        TitleSummary.objects.filter(title=self.title).update(
+            name='', review_count=5
+        )
+        TitleSummary.objects.rebuild()
+        self.assert_summary_matches(self.title)
+        self.assertEqual(TitleSummary.objects.count(), 2)
+
+
+class ScoreCountersTests(TestCase):
+    """Счётчики оценок и рейтинг совпадают с таблицей отзывов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Первое', year=2000)
+        cls.other = Title.objects.create(name='Второе', year=2001)
+        cls.authors = [
+            User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@example.com'
+            )
+            for number in range(3)
+        ]
+
+    def assert_counters(self, title, scores):
+        title.refresh_from_db()
+        expected = {score: scores.count(score) for score in SCORES}
+        self.assertEqual(title.score_distribution, expected)
+        self.assertEqual(title.review_count, len(scores))
+        self.assertEqual(title.rating_sum, sum(scores))
+        if scores:
+            self.assertAlmostEqual(title.rating, sum(scores) / len(scores))
+        else:
+            self.assertIsNone(title.rating)
+
+    def test_counters_follow_reviews(self):
+        first, second, third = [
+            Review.objects.create(
+                title=self.title, author=author, text='Текст', score=score
+            )
+            for author, score in zip(self.authors, (10, 10, 3))
+        ]
+        self.assert_counters(self.title, [10, 10, 3])
+
+        second.score = 1
+        second.save()
+        self.assert_counters(self.title, [10, 1, 3])
+
+        third.title = self.other
+        third.save()
+        self.assert_counters(self.title, [10, 1])
+        self.assert_counters(self.other, [3])
+
+        first.delete()
+        self.assert_counters(self.title, [1])
+        third.delete()
+        self.assert_counters(self.other, [])
+
+    def test_refresh_ratings_restores_counters(self):
+        Review.objects.create(
+            title=self.title, author=self.authors[0], text='Текст', score=7
+        )
+        Title.objects.update(score_7=5, review_count=9, rating_sum=0)
+        Title.objects.refresh_ratings()
+        self.assert_counters(self.title, [7])
+        self.assert_counters(self.other, [])
+
+
+class PurgeDeletedTests(TestCase):
+    """purge_deleted удаляет помеченные записи вместе с зависимыми."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Удаляемое', year=2000)
+        cls.other = Title.objects.create(name='Остаётся', year=2001)
+        cls.user = User.objects.create(
+            username='leaving', email='leaving@example.com'
+        )
+        cls.reader = User.objects.create(
+            username='reader', email='reader@example.com'
+        )
+        for title in (cls.title, cls.other):
+            for author, score in ((cls.user, 2), (cls.reader, 9)):
+                review = Review.objects.create(
+                    title=title, author=author, text='Текст', score=score
+                )
+                for commenter in (cls.user, cls.reader):
+                    Comments.objects.create(
+                        review=review, author=commenter, text='Комментарий'
+                    )
+        TitleSummary.objects.rebuild()
+
+    def test_purge_deleted_title(self):
+        Title.objects.filter(pk=self.title.pk).mark_deleted()
+        self.assertFalse(
+            TitleSummary.objects.filter(title=self.title).exists()
+        )
+        self.assertEqual(purge_deleted(batch_size=1), (1, 6))
+        self.assertFalse(Title.objects.filter(pk=self.title.pk).exists())
+        self.assertFalse(
+            Review.objects.filter(title_id=self.title.pk).exists()
+        )
+        self.assertFalse(
+            Comments.objects.filter(review__title_id=self.title.pk).exists()
+        )
+        self.assertEqual(Review.objects.filter(title=self.other).count(), 2)
+        self.assertEqual(purge_deleted(), (0, 0))
+
+    def test_purge_deleted_user(self):
+        self.user.mark_deleted()
+        self.assertEqual(purge_deleted(batch_size=1), (1, 8))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(
+            Review.objects.filter(author_id=self.user.pk).exists()
+        )
+        self.assertFalse(
+            Comments.objects.filter(author_id=self.user.pk).exists()
+        )
+        self.assertEqual(Comments.objects.count(), 2)
+        for title in (self.title, self.other):
+            title.refresh_from_db()
+            self.assertEqual(title.review_count, 1)
+            self.assertEqual(title.rating, 9)
+            self.assertEqual(title.score_distribution[2], 0)
+            summary = TitleSummary.objects.get(title=title)
+            self.assertEqual(summary.review_count, 1)
+            self.assertEqual(summary.rating, 9)
+            self.assertEqual(summary.score_distribution[2], 0)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 @admin.register(User)
@@ -16,3 +16,17 @@ class ReviewAdmin(admin.ModelAdmin):
     )
     search_fields = ('username', )
     list_filter = ('username', )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'to',
+        'subject',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
+    )
+    search_fields = ('to', )
+    list_filter = ('sent_at', )
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from users.outbox import send_pending
+
+
+class Command(BaseCommand):
+    """Обработчик очереди исходящих писем."""
+
+    help = 'Отправляет письма из очереди с повторами при ошибках.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, опрашивая очередь.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, секунды.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = send_pending(
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts']
+                )
+            except Exception as error:
+                if not options['loop']:
+                    raise
+                # Ошибка одной пачки не останавливает обработчик.
+                self.stderr.write(f'Ошибка обработки очереди: {error!r}')
+                sent = failed = 0
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, с ошибкой: {failed}'
+                )
+            if not options['loop']:
+                return
+            if not sent and not failed:
+                time.sleep(options['interval'])
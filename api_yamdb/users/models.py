@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 from .validators import validate_username
 
@@ -35,6 +36,16 @@ class User(AbstractUser):
         max_length=20,
         verbose_name='Роль пользователя'
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов'
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Удалён'
+    )
 
     class Meta:
         constraints = [
@@ -43,6 +54,13 @@ class User(AbstractUser):
                 name='unique_user_email'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_deleted=True),
+                name='user_deleted_idx'
+            ),
+        ]
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
@@ -56,6 +74,16 @@ class User(AbstractUser):
         except ValidationError as e:
             raise ValidationError({'username': e})
 
+    def mark_deleted(self):
+        """
+        Сразу скрывает пользователя и запрещает вход. Его отзывы,
+        комментарии и саму запись удаляет purge_deleted.
+        """
+        type(self).objects.filter(pk=self.pk).update(
+            is_deleted=True, is_active=False
+        )
+        self.is_deleted, self.is_active = True, False
+
     @property
     def is_user(self):
         """Пользователь по умолчанию."""
@@ -73,3 +101,58 @@ class User(AbstractUser):
             self.role == User.ADMIN
             or self.is_superuser
         )
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема'
+    )
+    body = models.TextField(
+        verbose_name='Текст письма'
+    )
+    from_email = models.EmailField(
+        max_length=settings.EMAIL_MAX_LENGTH,
+        verbose_name='Отправитель'
+    )
+    to = models.EmailField(
+        max_length=settings.EMAIL_MAX_LENGTH,
+        verbose_name='Получатель'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Число попыток'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время следующей попытки'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(sent_at__isnull=True),
+                name='outgoing_email_pending_idx'
+            ),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+OUTBOX = 'outbox'
+THREAD = 'thread'
+SYNC = 'sync'
+
+
+@lru_cache(maxsize=None)
+def _get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.EMAIL_THREAD_WORKERS,
+        thread_name_prefix='email'
+    )
+
+
+def deliver_email(subject, message, recipient):
+    """
+    Отправляет письмо способом из настройки EMAIL_DELIVERY:
+    через очередь в базе, в фоновом потоке или сразу.
+    """
+    mode = settings.EMAIL_DELIVERY
+    if mode == OUTBOX:
+        OutgoingEmail.objects.create(
+            subject=subject,
+            body=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=recipient
+        )
+        return
+    args = (subject, message, settings.DEFAULT_FROM_EMAIL, [recipient])
+    if mode == THREAD:
+        _get_executor().submit(send_mail, *args)
+        return
+    send_mail(*args)
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной отправкой."""
+    return timedelta(seconds=min(
+        settings.EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_RETRY_MAX_DELAY
+    ))
+
+
+def mark_failed(email, error):
+    """Засчитывает неудачную попытку и назначает следующую."""
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def claim_pending(batch_size, max_attempts, lease):
+    """
+    Забирает пачку готовых к отправке писем и откладывает
+    их следующую попытку на время аренды, чтобы другие
+    обработчики не отправили те же письма.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                sent_at__isnull=True,
+                next_attempt_at__lte=now,
+                attempts__lt=max_attempts
+            ).order_by('next_attempt_at')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=now + lease)
+    return emails
+
+
+def send_pending(batch_size=100, max_attempts=5, lease=timedelta(minutes=5)):
+    """
+    Отправляет пачку писем из очереди через одно SMTP-соединение.
+    Возвращает число отправленных и неудачных писем.
+    """
+    emails = claim_pending(batch_size, max_attempts, lease)
+    if not emails:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # Соединение не открылось: попытка засчитывается всей пачке,
+        # иначе max_attempts не остановит повторы при недоступном SMTP.
+        for email in emails:
+            mark_failed(email, error)
+        failed = emails
+    else:
+        with connection:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=[email.to],
+                    connection=connection
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    mark_failed(email, error)
+                    failed.append(email)
+                else:
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    sent.append(email)
+    OutgoingEmail.objects.bulk_update(sent, ['attempts', 'sent_at'])
+    OutgoingEmail.objects.bulk_update(
+        failed, ['attempts', 'last_error', 'next_attempt_at']
+    )
+    return len(sent), len(failed)
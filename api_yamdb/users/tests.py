@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import OutgoingEmail
+from .outbox import send_pending
+
+
+class SendPendingTests(TestCase):
+    """Очередь писем отправляется пачкой и повторяет неудачные."""
+
+    def setUp(self):
+        for number in range(2):
+            OutgoingEmail.objects.create(
+                subject='Код подтверждения',
+                body=f'Код {number}',
+                from_email='yamdbsupport@mail.com',
+                to=f'user{number}@example.com'
+            )
+
+    def test_sends_pending_once(self):
+        self.assertEqual(send_pending(), (2, 0))
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['user0@example.com', 'user1@example.com']
+        )
+        self.assertFalse(
+            OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+        )
+        self.assertEqual(send_pending(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_connection_counts_attempt(self):
+        connection = mock.Mock()
+        connection.open.side_effect = OSError('SMTP недоступен')
+        with mock.patch(
+            'users.outbox.get_connection', return_value=connection
+        ):
+            self.assertEqual(send_pending(max_attempts=1), (0, 2))
+        for email in OutgoingEmail.objects.all():
+            self.assertEqual(email.attempts, 1)
+            self.assertIn('SMTP недоступен', email.last_error)
+            self.assertIsNone(email.sent_at)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+        # Исчерпавшие попытки письма больше не забираются.
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_pending(max_attempts=1), (0, 0))
+        self.assertEqual(mail.outbox, [])
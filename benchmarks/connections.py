@@ -0,0 +1,81 @@
+"""
+Задержка списка произведений при разных режимах соединений с БД:
+новое соединение на каждый запрос, постоянные соединения и пул.
+
+Пример:
+    python -m benchmarks.connections --db postgres --requests 500 \
+        --concurrency 8
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .stats import load
+
+SCENARIO = 'titles-list'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Сравнение режимов соединений с БД.'
+    )
+    parser.add_argument(
+        '--db', choices=('sqlite', 'postgres'), default='postgres'
+    )
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=4)
+    return parser.parse_args(argv)
+
+
+def run_mode(mode, args, output):
+    """Прогон в отдельном процессе: режим задаётся настройками Django."""
+    command = [
+        sys.executable, '-m', 'benchmarks.run',
+        '--db', args.db, '--keepdb', '--scenario', SCENARIO,
+        '--titles', str(args.titles),
+        '--requests', str(args.requests),
+        '--concurrency', str(args.concurrency),
+        '--connections', mode, '--output', str(output),
+    ]
+    # Код 1 означает лишь превышение бюджетов: результаты сохранены.
+    process = subprocess.run(
+        command, stdout=subprocess.DEVNULL,
+        cwd=Path(__file__).resolve().parent.parent
+    )
+    if process.returncode not in (0, 1):
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return load(output)['scenarios'][SCENARIO]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = ['fresh', 'persistent']
+    if args.db == 'postgres':
+        modes.append('pooled')
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in modes:
+            results[mode] = run_mode(
+                mode, args, Path(directory) / f'{mode}.json'
+            )
+    base = results['fresh']['latency_ms']
+    print(
+        f'{"режим":<12}{"rps":>9}{"p50":>9}{"p95":>9}'
+        f'{"Δp50":>9}{"Δp95":>9}'
+    )
+    for mode, stats in results.items():
+        latency = stats['latency_ms']
+        print(
+            f'{mode:<12}{stats["throughput_rps"]:>9}'
+            f'{latency["p50"]:>9}{latency["p95"]:>9}'
+            f'{latency["p50"] - base["p50"]:>+9.3f}'
+            f'{latency["p95"] - base["p95"]:>+9.3f}'
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import random
+from itertools import islice
+
+from reviews.models import (Category, Comments, Genre, Review, Title,
+                            TitleGenre, TitleSummary)
+from users.models import User
+
+CATEGORIES = 10
+GENRES = 20
+ADMIN_USERNAME = 'bench_admin'
+
+
+def insert(model, objects, batch_size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        model.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def seed(titles, reviews, comments, seed=0, batch_size=5000):
+    """
+    Заполняет пустую базу: titles произведений, по reviews отзывов
+    на произведение и по comments комментариев на отзыв.
+    Данные зависят только от параметров и seed.
+    """
+    rng = random.Random(seed)
+    users = max(reviews, comments, 1)
+    insert(User, (
+        User(
+            username=f'user{number}',
+            email=f'user{number}@example.com',
+            password='!'
+        )
+        for number in range(users)
+    ), batch_size)
+    User.objects.create(
+        username=ADMIN_USERNAME,
+        email=f'{ADMIN_USERNAME}@example.com',
+        password='!',
+        role='admin'
+    )
+    user_ids = list(
+        User.objects.exclude(username=ADMIN_USERNAME).order_by(
+            'pk'
+        ).values_list('pk', flat=True)
+    )
+    insert(Category, (
+        Category(name=f'Категория {number}', slug=f'category-{number}')
+        for number in range(CATEGORIES)
+    ), batch_size)
+    insert(Genre, (
+        Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(GENRES)
+    ), batch_size)
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    genre_ids = list(Genre.objects.values_list('pk', flat=True))
+    insert(Title, (
+        Title(
+            name=f'Произведение {number}',
+            year=rng.randint(1950, 2020),
+            description=f'Описание произведения {number}',
+            category_id=rng.choice(category_ids)
+        )
+        for number in range(titles)
+    ), batch_size)
+    title_ids = list(Title.objects.order_by('pk').values_list('pk', flat=True))
+    insert(TitleGenre, (
+        TitleGenre(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rng.sample(genre_ids, rng.randint(1, 3))
+    ), batch_size)
+    insert(Review, (
+        Review(
+            title_id=title_id,
+            author_id=author_id,
+            text=f'Отзыв {author_id} на {title_id}',
+            score=rng.randint(1, 10)
+        )
+        for title_id in title_ids
+        for author_id in rng.sample(user_ids, reviews)
+    ), batch_size)
+    review_ids = Review.objects.order_by('pk').values_list('pk', flat=True)
+    insert(Comments, (
+        Comments(
+            review_id=review_id,
+            author_id=author_id,
+            text=f'Комментарий {author_id}'
+        )
+        for review_id in review_ids.iterator()
+        for author_id in rng.sample(user_ids, comments)
+    ), batch_size)
+    Title.objects.refresh_ratings()
+    TitleSummary.objects.rebuild(chunk_size=batch_size)
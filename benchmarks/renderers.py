@@ -0,0 +1,102 @@
+"""
+Скорость рендеринга и разбора JSON: стандартные JSONRenderer и
+JSONParser DRF против FastJSONRenderer и FastJSONParser на данных
+TitleGetSerializer и ReviewSerializer.
+
+Пример:
+    python -m benchmarks.renderers --titles 2000 --page 100
+"""
+import argparse
+import io
+import sys
+from time import perf_counter
+
+from .run import setup_django
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк рендереров JSON.')
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument(
+        '--reviews', type=int, default=10, help='Отзывов на произведение.'
+    )
+    parser.add_argument('--page', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--db', choices=('sqlite', 'postgres'), default='sqlite'
+    )
+    parser.add_argument('--keepdb', action='store_true')
+    args = parser.parse_args(argv)
+    args.connections = None
+    return args
+
+
+def best_of(func, repeat):
+    """Лучшее время одного вызова из repeat, в миллисекундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        best = min(best, perf_counter() - started)
+    return best * 1000
+
+
+def get_payloads(page):
+    from api.v1.serializers import ReviewSerializer, TitleGetSerializer
+    from reviews.models import Review, Title
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('pk')[:page]
+    reviews = Review.objects.select_related('author').order_by('pk')[:page]
+    return {
+        'titles': {'count': page, 'next': None, 'previous': None,
+                   'results': TitleGetSerializer(titles, many=True).data},
+        'reviews': {'count': page, 'next': None, 'previous': None,
+                    'results': ReviewSerializer(reviews, many=True).data},
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_django(args)
+    from api.v1.parsers import FastJSONParser
+    from api.v1.renderers import FastJSONRenderer, orjson
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from reviews.models import Title
+
+    from .dataset import seed
+    if orjson is None:
+        print('orjson не установлен: FastJSONRenderer работает как DRF.')
+    if not Title.objects.exists():
+        seed(args.titles, args.reviews, 0, seed=args.seed)
+    pairs = (
+        ('drf', JSONRenderer(), JSONParser()),
+        ('fast', FastJSONRenderer(), FastJSONParser()),
+    )
+    print(
+        f'{"данные":<10}{"рендерер":<10}{"КБ":>8}'
+        f'{"render, мс":>12}{"parse, мс":>12}'
+    )
+    for name, payload in get_payloads(args.page).items():
+        for label, renderer, parser in pairs:
+            content = renderer.render(payload)
+            render_ms = best_of(lambda: renderer.render(payload), args.repeat)
+            parse_ms = best_of(
+                lambda: parser.parse(io.BytesIO(content)), args.repeat
+            )
+            print(
+                f'{name:<10}{label:<10}{len(content) / 1024:>8.1f}'
+                f'{render_ms:>12.3f}{parse_ms:>12.3f}'
+            )
+    if not args.keepdb:
+        from django.db import connection
+        connection.creation.destroy_test_db(
+            connection.settings_dict['NAME'], verbosity=0
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Нагрузочный прогон API внутри процесса.
+
+Пример:
+    python -m benchmarks.run --titles 2000 --reviews 20 --comments 3 \
+        --concurrency 8 --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / 'api_yamdb'))
+
+_local = threading.local()
+
+CONNECTION_MODES = {
+    'fresh': {'CONN_MAX_AGE': '0'},
+    'persistent': {'CONN_MAX_AGE': '600'},
+    'pooled': {'DB_ENGINE': 'api.db.backends.postgresql_pool'},
+}
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая запросы к БД."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк API YaMDb.')
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument(
+        '--reviews', type=int, default=10, help='Отзывов на произведение.'
+    )
+    parser.add_argument(
+        '--comments', type=int, default=2, help='Комментариев на отзыв.'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--db', choices=('sqlite', 'postgres'), default='sqlite',
+        help='postgres берёт параметры подключения из переменных '
+             'окружения, как settings.py.'
+    )
+    parser.add_argument(
+        '--keepdb', action='store_true',
+        help='Не удалять тестовую базу и переиспользовать её данные.'
+    )
+    parser.add_argument(
+        '--requests', type=int, default=200,
+        help='Запросов на сценарий.'
+    )
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--scenario', action='append', dest='scenarios',
+        help='Запустить только указанные сценарии.'
+    )
+    parser.add_argument(
+        '--connections', choices=tuple(CONNECTION_MODES),
+        help='Открывать и закрывать соединения с БД, как сервер: '
+             'на каждый запрос, постоянные или из пула (только postgres).'
+    )
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='Допустимое ухудшение относительно базового прогона.'
+    )
+    parser.add_argument(
+        '--min-delta-ms', type=float, default=1.0,
+        help='Меньший рост p95 не считается регрессией.'
+    )
+    parser.add_argument(
+        '--budgets', type=Path, default=ROOT / 'budgets.json',
+        help='Бюджеты p95 и запросов к БД по сценариям.'
+    )
+    args = parser.parse_args(argv)
+    if args.connections == 'pooled' and args.db != 'postgres':
+        parser.error('--connections pooled требует --db postgres.')
+    return args
+
+
+def setup_django(args):
+    if args.db == 'sqlite':
+        os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+        os.environ['DB_NAME'] = str(
+            Path(tempfile.gettempdir()) / 'yamdb_benchmark.sqlite3'
+        )
+    if args.connections:
+        os.environ.update(CONNECTION_MODES[args.connections])
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = (
+            settings.DATABASES['default']['NAME']
+        )
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=args.keepdb, serialize=False
+    )
+
+
+def request_once(path, token, server_connections=False):
+    """
+    Выполняет запрос тестовым клиентом. Клиент не закрывает
+    соединения с БД между запросами, поэтому с server_connections
+    это делается вокруг запроса, как в сигналах сервера.
+    """
+    from django.db import close_old_connections, connection
+    from django.test import Client
+    client = getattr(_local, 'client', None)
+    if client is None:
+        client = _local.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+    counter = QueryCounter()
+    started = perf_counter()
+    if server_connections:
+        close_old_connections()
+    with connection.execute_wrapper(counter):
+        response = client.get(path)
+    if server_connections:
+        close_old_connections()
+    elapsed = perf_counter() - started
+    return elapsed, response.status_code, counter.count
+
+
+def run_scenario(executor, template, samples, args, token):
+    from .stats import summarize
+    paths = [
+        template.format(**samples[number % len(samples)])
+        for number in range(args.warmup + args.requests)
+    ]
+    server_connections = args.connections is not None
+
+    def request(path):
+        return request_once(path, token, server_connections)
+
+    list(executor.map(request, paths[:args.warmup]))
+    started = perf_counter()
+    results = list(executor.map(request, paths[args.warmup:]))
+    return summarize(results, perf_counter() - started)
+
+
+def close_connections(executor, workers):
+    """Закрывает соединения с БД во всех потоках пула."""
+    from django.db import connections
+    barrier = threading.Barrier(workers)
+
+    def close(_):
+        barrier.wait(timeout=60)
+        connections.close_all()
+
+    list(executor.map(close, range(workers)))
+
+
+def get_meta(args):
+    import django
+    from django.db import connection
+    from reviews.models import Comments, Review, Title
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'db': connection.vendor,
+        'dataset': {
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comments.objects.count(),
+            'seed': args.seed,
+        },
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'connections': args.connections,
+    }
+
+
+def print_results(result, stdout=sys.stdout):
+    stdout.write(
+        f'{"сценарий":<20}{"rps":>9}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"запросы":>9}{"ошибки":>8}\n'
+    )
+    for name, stats in result['scenarios'].items():
+        latency = stats['latency_ms']
+        stdout.write(
+            f'{name:<20}{stats["throughput_rps"]:>9}{latency["p50"]:>9}'
+            f'{latency["p95"]:>9}{latency["p99"]:>9}'
+            f'{stats["queries"]["mean"]:>9}{stats["errors"]:>8}\n'
+        )
+
+
+def save(result, output):
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+
+
+def check(result, args):
+    from .stats import check_budgets, compare, load
+    problems = []
+    if args.baseline:
+        problems += compare(
+            result, load(args.baseline), args.tolerance, args.min_delta_ms
+        )
+    if args.budgets and args.budgets.exists():
+        problems += check_budgets(result, load(args.budgets))
+    return problems
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_django(args)
+    from api.v1.authentication import issue_access_token
+    from reviews.models import Title
+    from users.models import User
+
+    from .dataset import ADMIN_USERNAME, seed
+    from .scenarios import SCENARIOS, get_samples
+    if not Title.objects.exists():
+        seed(args.titles, args.reviews, args.comments, seed=args.seed)
+    token = str(issue_access_token(User.objects.get(username=ADMIN_USERNAME)))
+    samples = get_samples()
+    result = {'meta': get_meta(args), 'scenarios': {}}
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        for name, template in SCENARIOS:
+            if args.scenarios and name not in args.scenarios:
+                continue
+            result['scenarios'][name] = run_scenario(
+                executor, template, samples, args, token
+            )
+        close_connections(executor, args.concurrency)
+    print_results(result)
+    output = args.output or ROOT / 'results' / (
+        datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    )
+    save(result, output)
+    print(f'Результаты: {output}')
+    problems = check(result, args)
+    if not args.keepdb:
+        from django.db import connection
+        connection.creation.destroy_test_db(
+            connection.settings_dict['NAME'], verbosity=0
+        )
+    for problem in problems:
+        print(f'РЕГРЕССИЯ {problem}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+from reviews.models import Category, Genre, Review, Title
+
+SAMPLES = 50
+
+SCENARIOS = (
+    ('titles-list', '/api/v1/titles/'),
+    ('titles-top-rated', '/api/v1/titles/?category={category}'
+                         '&ordering=-rating'),
+    ('titles-by-genre', '/api/v1/titles/?genre={genre}'),
+    ('titles-keyset', '/api/v1/titles/?pagination=keyset'),
+    ('titles-widget', '/api/v1/titles/?fields=id,name,rating'),
+    ('titles-search', '/api/v1/titles/?q={word}'),
+    ('title-detail', '/api/v1/titles/{title}/'),
+    ('title-scores', '/api/v1/titles/{title}/score-distribution/'),
+    ('reviews-list', '/api/v1/titles/{title}/reviews/'),
+    ('review-detail', '/api/v1/titles/{title}/reviews/{review}/'),
+    ('comments-list', '/api/v1/titles/{title}/reviews/{review}/comments/'),
+    ('categories-list', '/api/v1/categories/'),
+    ('genres-list', '/api/v1/genres/'),
+    ('users-list', '/api/v1/users/'),
+    ('users-me', '/api/v1/users/me/'),
+)
+
+
+def get_samples(count=SAMPLES):
+    """
+    Набор значений для подстановки в пути: запросы сценария
+    перебирают их по кругу, а не читают один и тот же объект.
+    """
+    titles = list(
+        Title.objects.filter(review_count__gt=0).order_by('pk').values_list(
+            'pk', 'name'
+        )[:count]
+    )
+    reviews = dict(
+        Review.objects.filter(
+            title_id__in=[pk for pk, _ in titles]
+        ).order_by('title_id', 'pk').values_list('title_id', 'pk')
+    )
+    categories = list(Category.objects.values_list('slug', flat=True))
+    genres = list(Genre.objects.values_list('slug', flat=True))
+    return [
+        {
+            'title': title_id,
+            'review': reviews[title_id],
+            'word': name.split()[-1],
+            'category': categories[number % len(categories)],
+            'genre': genres[number % len(genres)],
+        }
+        for number, (title_id, name) in enumerate(titles)
+    ]
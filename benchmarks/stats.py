@@ -0,0 +1,89 @@
+import json
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered, percent):
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def summarize(results, elapsed):
+    """Сводка прогона сценария: пропускная способность, задержки, запросы."""
+    latencies = sorted(latency * 1000 for latency, _, _ in results)
+    queries = [count for _, _, count in results]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, status, _ in results if status >= 400),
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            **{
+                f'p{percent}': round(percentile(latencies, percent), 3)
+                for percent in PERCENTILES
+            },
+            'max': round(latencies[-1], 3),
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        },
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """
+    Сравнивает прогон с базовым: задержка p95 выросла больше чем
+    на tolerance (и не меньше чем на min_delta_ms), упала пропускная
+    способность или выросло число запросов к БД.
+    """
+    regressions = []
+    for name, stats in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        p95 = stats['latency_ms']['p95']
+        base_p95 = base['latency_ms']['p95']
+        if (
+            p95 > base_p95 * (1 + tolerance)
+            and p95 - base_p95 >= min_delta_ms
+        ):
+            regressions.append(f'{name}: p95 {base_p95} -> {p95} мс')
+        rps = stats['throughput_rps']
+        if rps < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(
+                f'{name}: {base["throughput_rps"]} -> {rps} запросов/с'
+            )
+        if stats['queries']['max'] > base['queries']['max']:
+            regressions.append(
+                f'{name}: запросов к БД {base["queries"]["max"]} -> '
+                f'{stats["queries"]["max"]}'
+            )
+    return regressions
+
+
+def check_budgets(current, budgets):
+    """Сценарии, превысившие бюджет p95 или число запросов к БД."""
+    violations = []
+    for name, budget in budgets.items():
+        stats = current['scenarios'].get(name)
+        if stats is None:
+            continue
+        p95 = stats['latency_ms']['p95']
+        if 'p95_ms' in budget and p95 > budget['p95_ms']:
+            violations.append(
+                f'{name}: p95 {p95} мс > {budget["p95_ms"]} мс'
+            )
+        queries = stats['queries']['max']
+        if 'queries' in budget and queries > budget['queries']:
+            violations.append(
+                f'{name}: запросов к БД {queries} > {budget["queries"]}'
+            )
+        if stats['errors']:
+            violations.append(f'{name}: ошибок {stats["errors"]}')
+    return violations